@@ -1,48 +1,129 @@
 # UI.py
 import streamlit as st
 import pandas as pd
+from cube import performance_cube, performance_summary
+from data_loader import dataset_version
+from figure_cache import plotly_chart
+import instrumentation
+from scenarios import forecast_book
+from text_index import SWOT_FIELDS, search, swot_index, term_frequencies
+from uncertainty import simulate_scenarios
+import startup
 
-# --- Load Data ---
-@st.cache_data
-def load_data():
-    forecast_df = pd.read_csv("data/bajaj_monthly_forecast_with_mape.csv")
-    elasticity_df = pd.read_csv("data/Adj_Price_Elasticity.csv")
-    return forecast_df, elasticity_df
+# --- Tab 3 SWOT text search: queries rerun only this fragment against the cached index ---
+@st.fragment
+def render_swot_search():
+    index = instrumentation.measure("swot_index", startup.timed, "data_load", swot_index)
 
+    query = st.text_input("Search SWOT snippets", value="Affordable pricing", key="swot_query")
+    col1, col2 = st.columns(2)
+    with col1:
+        fields = st.multiselect("Fields", SWOT_FIELDS, default=["Strength"], key="swot_fields")
+    with col2:
+        countries = st.multiselect("Countries (all when empty)", list(index.countries), key="swot_countries")
+    exact = st.checkbox("Exact phrase", value=False, key="swot_exact")
+
+    fields = fields or None
+    countries = countries or None
+    matches = search(index, query, fields, countries, exact=exact)
+    if matches.empty:
+        st.info("No competitor mentions match this search.")
+    else:
+        st.dataframe(matches, hide_index=True)
+
+    st.markdown("**Most frequent terms per market**")
+    st.dataframe(term_frequencies(index, fields, countries, top_n=5), hide_index=True)
+
+# --- Tab 1 performance chart: filter changes rerun only this fragment ---
+@st.fragment
+def render_performance_chart():
+    from plotly import express as px
+
+    # Create new column layout for filters
+    col1, col2 = st.columns(2)
+
+    with col1:
+        select_all_countries = st.checkbox("Select All Countries", value=True, key="perf_all_countries")
+        cube = instrumentation.measure("performance_cube", startup.timed, "data_load", performance_cube)
+        countries = cube.countries
+        selected_country = st.multiselect(
+            "Select Country",
+            options=countries,
+            default=countries if select_all_countries else None
+        )
+
+    with col2:
+        select_all_models = st.checkbox("Select All Bike Models", value=True, key="perf_all_models")
+        models = cube.models
+        selected_bike_model = st.multiselect(
+            "Select Bike Model",
+            options=models,
+            default=models if select_all_models else None
+        )
+
+    def build_performance_chart():
+        # --- Summarize data at Quarter + Performance_Type level (slice of the precomputed cube, already chronological) ---
+        summary_df = instrumentation.measure("performance_summary", performance_summary, cube, selected_country, selected_bike_model)
+    
+        # --- Plotly grouped bar chart ---
+        fig = px.bar(
+            summary_df,
+            x='Quarter',
+            y='Sales_Units',
+            color='Performance_Type',
+            barmode='group',
+            color_discrete_map={'Actual': '#1f77b4', 'Forecast': '#ff7f0e'},
+            text='Sales_Units'  # This shows one number per bar
+        )
+    
+        fig.update_traces(
+            textposition='outside',
+            marker_line_width=0
+        )
+    
+        fig.update_layout(
+            title="Quarter-wise Export Sales Performance (Total Actual vs Forecast)",
+            xaxis_title="Quarter",
+            yaxis_title="Sales Units",
+            legend_title_text="Performance Type",
+            template="plotly_white",
+            bargap=0.2,
+            xaxis=dict(showgrid=False),
+            yaxis=dict(showgrid=False)
+        )
+        return fig
+
+    # --- Display chart (figure memoised per selection and Merged data version) ---
+    plotly_chart("performance", (selected_country, selected_bike_model), dataset_version("merged"),
+                 build_performance_chart, use_container_width=True)
+
+# --- Pricing simulator: price edits rerun only this fragment ---
+@st.fragment
 def render_forecast_simulator():
-    forecast_df, elasticity_df = load_data()
+    book = instrumentation.measure("forecast_book", startup.timed, "data_load", forecast_book)
 
     st.title("🔮 Forecast Simulator with Price Sensitivity")
 
     # --- User Selections ---
-    selected_country = st.selectbox("Select Country", sorted(forecast_df["Country"].unique()))
-    selected_bike = st.selectbox("Select Bike Model", sorted(forecast_df["Bike_Model"].unique()))
+    selected_country = st.selectbox("Select Country", sorted(book.params["Country"].unique()), key="sim_country")
+    selected_bike = st.selectbox("Select Bike Model", sorted(book.params["Bike_Model"].unique()), key="sim_bike")
 
-    # --- Filter forecast ---
-    filtered_df = forecast_df[
-        (forecast_df["Country"] == selected_country) &
-        (forecast_df["Bike_Model"] == selected_bike)
-    ].copy()
-
-    if filtered_df.empty:
+    # --- Pair parameters (base price, elasticity, intensity) ---
+    pair = book.pair_index.get_indexer([(selected_country, selected_bike)])[0]
+    if pair < 0:
         st.warning("No forecast data for selected Country and Bike Model.")
         return
-
-    # --- Get Elasticity ---
-    elasticity_row = elasticity_df[
-        (elasticity_df["Country"] == selected_country) &
-        (elasticity_df["Bike_Model"] == selected_bike)
-    ]
-    elasticity = elasticity_row["Elasticity"].values[0] if not elasticity_row.empty else -1.0
-    intensity = elasticity_row["Comp_Intensity"].values[0] if "Comp_Intensity" in elasticity_row.columns else 1.0
-    effective_elasticity = elasticity * intensity
+    params = book.params.iloc[pair]
+    elasticity = params["Elasticity"]
+    intensity = params["Comp_Intensity"]
+    effective_elasticity = params["Effective_Elasticity"]
 
     st.markdown(f"**Price Elasticity:** {round(elasticity, 2)}")
     st.markdown(f"**Competitive Intensity Multiplier:** {round(intensity, 2)}")
     st.markdown(f"**Effective Elasticity:** {round(effective_elasticity, 2)}")
 
     # --- Base Price and Adjustment ---
-    base_price = filtered_df["Unit_Price"].mean()
+    base_price = params["Base_Price"]
     # Styled input using text_input
     st.markdown(
     """
@@ -63,11 +144,11 @@ def render_forecast_simulator():
 )
 
     # Native input below it
-    new_price = st.number_input("", value=round(base_price, 2))
-    price_change_pct = (new_price - base_price) / base_price
-
-    filtered_df["Adjusted_Forecast"] = filtered_df["Predicted_Units"] * (1 + effective_elasticity * price_change_pct)
-    filtered_df["Revenue"] = filtered_df["Adjusted_Forecast"] * new_price
+    # Keyed per pair so each Country/Bike_Model keeps its own price while switching
+    new_price = st.number_input("", value=round(base_price, 2), key=f"sim_price_{selected_country}_{selected_bike}")
+    scenario = pd.DataFrame({"Country": [selected_country], "Bike_Model": [selected_bike], "New_Price": [new_price]})
+    # Point forecast plus P10/P50/P90 bands from MAPE and elasticity uncertainty (Monte Carlo)
+    filtered_df = instrumentation.measure("simulator", simulate_scenarios, book, scenario)
 
     # --- Display Results ---
     st.subheader("📈 Forecast vs Adjusted Forecast")
@@ -82,18 +163,17 @@ def render_forecast_simulator():
         </style>
     """, unsafe_allow_html=True)
     # --- Show Table ---
-    display_df = (filtered_df[["Month", "Predicted_Units", "Adjusted_Forecast", "Revenue"]])
+    display_df = (filtered_df[["Month", "Predicted_Units", "Adjusted_Forecast", "Adjusted_P10", "Adjusted_P90", "Revenue", "Revenue_P10", "Revenue_P90"]])
     st.dataframe(display_df, use_container_width=False, height=400)
 #st.dataframe(filtered_df[["Month", "Predicted_Units", "Adjusted_Forecast", "Revenue"]])
 
     # --- Chart ---
-    filtered_df["Month_Label"] = pd.to_datetime(filtered_df["Month"], format="%b-%y").dt.strftime("%b-%y")
-    filtered_df = filtered_df.sort_values("Month_Label").copy()
+    filtered_df = filtered_df.sort_values("Month_Period")
     filtered_df["Month_Label"] = pd.Categorical(
-        filtered_df["Month_Label"],
+        filtered_df["Month"],
         ordered=True,
-        categories=sorted(filtered_df["Month_Label"].unique(), key=lambda x: pd.to_datetime(x, format="%b-%y"))
+        categories=filtered_df["Month"].unique()
     )
 
-    st.line_chart(filtered_df.set_index("Month_Label")[["Predicted_Units", "Adjusted_Forecast"]])
+    st.line_chart(filtered_df.set_index("Month_Label")[["Predicted_Units", "Adjusted_Forecast", "Adjusted_P10", "Adjusted_P90"]])
     st.success("Simulation complete. Adjust the price above to see its effect on your forecast.")
@@ -0,0 +1,282 @@
+# actuals.py
+import argparse
+import csv
+import io
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATASETS, LINE_TERMINATORS, current_version, dataset_path, prepare, read_dataset
+from growth import compound_rate
+from periods import quarter_labels
+from pipeline import (forecast_accuracy, forecast_errors, growth_state, next_quarter_forecast, read_output,
+                      write_outputs)
+
+PAIR_KEYS = ["Country", "Bike_Model"]
+# New actuals are appended to Sales_Data as they are, so they need all of its columns (Distributor included);
+# the book itself only uses Country, Bike_Model, Quarter and Sales_Units
+SALES_COLUMNS = ["Country", "Bike_Model", "Quarter", "Sales_Units", "Distributor"]
+MERGED_COLUMNS = ["Country", "Bike_Model", "Quarter", "Sales_Units", "A_F"]
+FORECAST_COLUMNS = ["Country", "Bike_Model", "Quarter", "Predicted_Units", "MAPE (%)", "Actual_Units"]
+TAIL_BLOCK = 1 << 16  # Merged data is read backwards in blocks of this many bytes to find its forecast rows
+
+
+def _by_quarter(df):
+    return {int(q): part.reset_index(drop=True) for q, part in df.groupby("Quarter_Period", sort=True)}
+
+
+class ActualsBook:
+    """Forecast rows and the running aggregates derived from the actuals, kept per quarter.
+
+    append() folds in one quarter of actuals touching only that quarter's rows
+    and the per-country / per-pair running totals, so its cost does not grow
+    with the length of the history. The growth state is pipeline.growth_state;
+    load() takes it from the materialised outputs, so the history is only read
+    when those are missing or stale.
+    """
+
+    def __init__(self, growth, forecast_df, last_period=None):
+        self.growth = growth.set_index("Country")
+        self.forecast = _by_quarter(forecast_df)
+        self.accuracy = forecast_errors(forecast_df)
+        self.last_period = int(growth["Last_Period"].max()) if last_period is None and len(growth) else last_period
+        self.merged = {}  # quarter -> Merged data rows of the quarters appended since loading
+
+    @classmethod
+    def from_history(cls, merged_df, forecast_df):
+        actual = merged_df[merged_df["A_F"] == "A"]
+        return cls(growth_state(actual), forecast_df)
+
+    @classmethod
+    def load(cls):
+        """Book for the data files as they are on disk."""
+        forecast = read_dataset("forecast")
+        growth = read_output("growth_state", {"sales": current_version("sales")[3]})
+        return cls(growth, forecast) if growth is not None else cls.from_history(read_dataset("merged"), forecast)
+
+    def append(self, actuals):
+        """Fold in one quarter of actuals (Country, Bike_Model, Quarter, Sales_Units rows)."""
+        actuals = prepare(actuals.copy())
+        periods = actuals["Quarter_Period"].unique()
+        if len(periods) != 1:
+            raise ValueError(f"Expected actuals for exactly one quarter, got {len(periods)}")
+        period = int(periods[0])
+        if self.last_period is not None and period <= self.last_period:
+            raise ValueError(f"Actuals for {quarter_labels([period])[0]} are not after the last loaded quarter "
+                             f"{quarter_labels([self.last_period])[0]}")
+
+        pair_units = (actuals.assign(**{k: actuals[k].astype(str) for k in PAIR_KEYS})
+                      .groupby(PAIR_KEYS)["Sales_Units"].sum())
+
+        # --- Merged data: this quarter's forecast rows become actual rows ---
+        flipped = pair_units.reset_index()
+        flipped.insert(2, "Quarter", quarter_labels([period] * len(flipped)))
+        flipped["A_F"] = "A"
+        flipped["Quarter_Period"] = period
+        self.merged[period] = flipped
+
+        # --- Forecast file: fill Actual_Units, then score the quarter's forecasts ---
+        if period in self.forecast:
+            rows = self.forecast[period]
+            keys = pd.MultiIndex.from_arrays([rows[k].astype(str) for k in PAIR_KEYS])
+            known = pair_units.reindex(keys).to_numpy()
+            rows = rows.assign(Actual_Units=np.where(np.isnan(known), rows["Actual_Units"], known))
+            # Replace (not add to) any score the quarter already had from provisional actuals
+            self.accuracy = (self.accuracy.sub(forecast_errors(self.forecast[period]), fill_value=0)
+                             .add(forecast_errors(rows), fill_value=0))
+            self.forecast[period] = rows
+
+        # --- Growth: one more observation for the countries with actuals this quarter ---
+        country_units = pair_units.groupby(level="Country").sum()
+        growth = self.growth.reindex(self.growth.index.union(country_units.index))
+        seen = growth["Last_Period"].notna() & growth.index.isin(country_units.index)
+        step = compound_rate(country_units.reindex(growth.index[seen]).to_numpy(),
+                             growth.loc[seen, "Last_Units"].to_numpy(), period - growth.loc[seen, "Last_Period"].to_numpy())
+        growth["Growth_Sum"] = growth["Growth_Sum"].fillna(0)
+        growth["Growth_N"] = growth["Growth_N"].fillna(0).astype(np.int64)
+        growth.loc[seen, "Growth_Sum"] += np.nan_to_num(step)
+        growth.loc[seen, "Growth_N"] += ~np.isnan(step)
+        growth.loc[country_units.index, "Last_Units"] = country_units.to_numpy(dtype=np.float64)
+        growth.loc[country_units.index, "Last_Period"] = period
+        self.growth = growth
+        self.last_period = period
+        return period
+
+    # --- Derived artifacts ---
+    def forecast_table(self):
+        return pd.concat([self.forecast[q] for q in sorted(self.forecast)], ignore_index=True)
+
+    def growth_state(self):
+        """Current growth state, in the form of the pipeline's growth_state output."""
+        state = self.growth.rename_axis("Country").reset_index()
+        return state.astype({"Last_Period": np.int64, "Growth_N": np.int64})
+
+    def growth_rates(self):
+        """Average quarter-on-quarter growth per country, as pipeline.growth_rates."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = self.growth["Growth_Sum"] / self.growth["Growth_N"].where(self.growth["Growth_N"] > 0)
+        result = rate.sort_values(ascending=False).reset_index()
+        result.columns = ["Country", "Avg Growth Rate"]
+        return result
+
+    def forecast_mape(self):
+        """Forecast-vs-actual MAPE (%) per pair over every quarter with known actuals, as pipeline.forecast_accuracy."""
+        return forecast_accuracy(self.accuracy)
+
+    def next_quarters(self, n_quarters=2):
+        """Forecast for the first n quarters after the last actuals, as pipeline.next_quarter_forecast."""
+        upcoming = [q for q in sorted(self.forecast) if self.last_period is None or q > self.last_period][:n_quarters]
+        if not upcoming:
+            return next_quarter_forecast(self.forecast_table().iloc[:0], pd.DataFrame({"Quarter_Period": []}))
+        actual = pd.DataFrame({"Quarter_Period": [] if self.last_period is None else [self.last_period]})
+        return next_quarter_forecast(pd.concat([self.forecast[q] for q in upcoming], ignore_index=True),
+                                     actual, n_quarters)
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        if fh.tell() == 0:
+            return True
+        fh.seek(-1, os.SEEK_END)
+        return fh.read(1) in (b"\r", b"\n")
+
+
+def _stage_rows(name, df, columns):
+    """Copy of a dataset CSV with df's rows appended, written next to it as .tmp; returns the .tmp path.
+
+    The copy is byte for byte: the existing rows are never parsed.
+    """
+    path = dataset_path(name)
+    tmp_path = path + ".tmp"
+    shutil.copyfile(path, tmp_path)
+    terminator = LINE_TERMINATORS.get(name, "\n")
+    needs_break = not _ends_with_newline(tmp_path)
+    with open(tmp_path, "a", newline="") as fh:
+        if needs_break:
+            fh.write(terminator)
+        df[columns].to_csv(fh, index=False, header=False, lineterminator=terminator)
+    return tmp_path
+
+
+def _tail_offset(path, in_tail, block_size=TAIL_BLOCK):
+    """Byte offset where the file's trailing run of lines matching in_tail(line) starts; read backwards in blocks."""
+    with open(path, "rb") as fh:
+        body = len(fh.readline())
+        pos = fh.seek(0, os.SEEK_END)
+        carry = b""
+        while pos > body:
+            start = max(body, pos - block_size)
+            fh.seek(start)
+            chunk = fh.read(pos - start) + carry
+            lines = chunk.splitlines(keepends=True)
+            # The block's first line may be cut off: complete it with the next block read
+            carry = lines.pop(0) if start > body and lines else b""
+            end = start + len(chunk)
+            for line in reversed(lines):
+                if line.strip() and not in_tail(line):
+                    return end
+                end -= len(line)
+            pos = start
+        return body
+
+
+def _stage_merged_quarter(period, actual_rows):
+    """Copy of Merged data with one quarter's forecast rows turned into actual rows, written as .tmp.
+
+    Actual rows precede forecast rows in Merged data, so only the file's
+    trailing forecast rows are parsed and rewritten; the rest is copied as
+    bytes. Returns the .tmp path.
+    """
+    path = dataset_path("merged")
+    terminator = LINE_TERMINATORS.get("merged", "\n")
+    with open(path, "rb") as fh:
+        header = fh.readline()
+    a_f = next(csv.reader([header.decode().strip()])).index("A_F")
+    offset = _tail_offset(path, lambda line: next(csv.reader([line.decode().strip()]))[a_f].strip() == "F")
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        tail = pd.read_csv(io.BytesIO(header + fh.read()))
+        needs_break = offset > len(header) and not _ends_with(fh, offset)
+    if len(tail):
+        tail = prepare(tail)
+        tail = tail[tail["Quarter_Period"] != period]
+    rows = pd.concat([actual_rows[MERGED_COLUMNS], tail[MERGED_COLUMNS]], ignore_index=True) if len(tail) \
+        else actual_rows[MERGED_COLUMNS]
+    text = rows.to_csv(index=False, header=False, lineterminator=terminator)
+
+    tmp_path = path + ".tmp"
+    shutil.copyfile(path, tmp_path)
+    with open(tmp_path, "r+b") as fh:
+        fh.seek(offset)
+        fh.truncate()
+        fh.write(((terminator if needs_break else "") + text).encode())
+    return tmp_path
+
+
+def _ends_with(fh, offset):
+    """Whether the byte before offset ends a line."""
+    fh.seek(offset - 1)
+    return fh.read(1) in (b"\r", b"\n")
+
+
+def append_quarter(actuals_df):
+    """Apply one quarter of Sales_Data rows to the data files; returns the updated book.
+
+    actuals_df needs every Sales_Data column (SALES_COLUMNS). Its rows are
+    appended to Sales_Data, the quarter's forecast rows at the end of Merged
+    data become actual rows, and the forecast file (one row per pair and
+    forecast quarter, whatever the history length) gets Actual_Units. The book's
+    growth state, growth rates, MAPE and next-quarter forecast are then
+    recorded as pipeline outputs for the new files, so neither the app nor a
+    running watcher recomputes them.
+
+    All three files are first written in full to .tmp copies next to them and
+    only then swapped in with os.replace, so a bad file or a failed write
+    leaves every data file untouched (a retry cannot append the quarter twice)
+    and a reader never sees a half-written file.
+    """
+    missing = [c for c in SALES_COLUMNS if c not in actuals_df.columns]
+    if missing:
+        raise ValueError(f"Actuals are appended to {DATASETS['sales']} and need its columns; missing {missing}")
+    book = ActualsBook.load()
+    period = book.append(actuals_df)
+    forecast = book.forecast_table()
+    forecast["Quarter"] = quarter_labels(forecast["Quarter_Period"], compact=True)
+
+    staged = []
+    try:
+        staged.append(_stage_merged_quarter(period, book.merged[period]))
+        forecast_tmp = dataset_path("forecast") + ".tmp"
+        forecast[FORECAST_COLUMNS].to_csv(forecast_tmp, index=False,
+                                          lineterminator=LINE_TERMINATORS.get("forecast", "\n"))
+        staged.append(forecast_tmp)
+        staged.append(_stage_rows("sales", actuals_df, SALES_COLUMNS))
+    except BaseException:
+        for name in ("merged", "forecast", "sales"):
+            if os.path.exists(dataset_path(name) + ".tmp"):
+                os.remove(dataset_path(name) + ".tmp")
+        raise
+    for tmp_path in staged:
+        os.replace(tmp_path, tmp_path[:-len(".tmp")])
+
+    outputs = {
+        "growth_state": book.growth_state(),
+        "growth_rates": book.growth_rates(),
+        "forecast_accuracy": book.forecast_mape(),
+        "forecast_summary": book.next_quarters(),
+    }
+    write_outputs(outputs, {name: current_version(name)[3] for name in ("sales", "forecast")})
+    return book
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load one quarter of actuals (Sales_Data schema) into the data files.")
+    parser.add_argument("actuals_csv", help=f"one quarter of rows with the {DATASETS['sales']} columns: "
+                                            + ", ".join(SALES_COLUMNS))
+    args = parser.parse_args()
+    book = append_quarter(pd.read_csv(args.actuals_csv))
+    print(f"loaded {quarter_labels([book.last_period])[0]} into {DATASETS['merged']} and {DATASETS['forecast']}")
+    print(book.growth_rates().to_string(index=False))
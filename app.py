@@ -1,27 +1,28 @@
 # Streamlit run MPHv4.py
+import startup
+startup.begin()
+
 import streamlit as st
-import pandas as pd
-import plotly, sys
-print("Plotly:", plotly.__version__, "Python:", sys.version)
-from plotly import express as px
-from UI import render_forecast_simulator
+from UI import render_forecast_simulator, render_performance_chart, render_swot_search
+from pipeline import output, output_version
+from figure_cache import plotly_chart
+from scoring import SCORE_WEIGHTS, distributor_scores, high_potential, high_potential_countries
+import instrumentation
+from watcher import WATCH_ENABLED, data_watcher
+startup.mark("imports")
+
+# Refreshed CSVs in data/ are rebuilt in the background; sessions keep the last good version meanwhile
+if WATCH_ENABLED:
+    data_watcher.start()
 
 # Set page config
 st.set_page_config(page_title="GTM Hub", layout="wide")
 st.title("🌍 AI Driven Go-to-Market planning hub")
 
-# Load data
-sales_df = pd.read_csv("data/Sales_Data.csv")
-distributor_df = pd.read_csv("data/Distributor_Data.csv")
-forecast_df = pd.read_csv("data/bajaj_forecast_with_actuals.csv")
-merged_df = pd.read_csv("data/Merged data.csv")
-cluster_df = pd.read_csv("data/distributor_clusters.csv")
-swot_df = pd.read_csv("data/Competitor_SWOT_Data.csv")
-Elastic_df = pd.read_csv("data/Adj_Price_Elasticity.csv")
-
-# Clean column headers
-cluster_df.columns = cluster_df.columns.str.strip()
-swot_df.columns = swot_df.columns.str.strip()
+# Tab outputs are precomputed by `python pipeline.py` and loaded on first access;
+# plotly is imported inside the sections that draw charts so it stays off the cold-start path
+def load_output(name):
+    return instrumentation.measure(name, startup.timed, "data_load", output, name)
 
 
 # Initialize session state
@@ -30,18 +31,20 @@ if "show_dashboard" not in st.session_state:
 
 
 
-# Create four tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
+# Section navigation: unlike st.tabs, only the selected section's body runs on a rerun
+SECTIONS = [
     "Sales Forecast & Analysis", 
     "Distributor Intelligence", 
     "Competitive Analysis",
     "Pricing-Forecast Simulator",
     "Unified BI Dashboard"
-    
-    ])
+    ]
+active_section = st.radio("Section", SECTIONS, horizontal=True, key="active_section", label_visibility="collapsed")
 
 # ================= Tab 1: Export Sales Analysis =================
-with tab1:
+if active_section == SECTIONS[0]:
+    from plotly import express as px
+
     with st.expander("🤖 Export Forecasting & Analysis Engine"):
         st.markdown("""
         **AI Engine Role:** Assist business teams in interpreting export market performance, growth and decline zones, and forecast generation.
@@ -58,34 +61,20 @@ with tab1:
 
         st.subheader("🔮 Sales Forecast for Next 2 Quarters")
 
-        # Step 1: Identify next two quarters dynamically
-        future_quarters = forecast_df['Quarter'].unique()
-        future_quarters.sort()  # Ensure proper chronological order
-        future_quarters = [q for q in future_quarters if q not in sales_df['Quarter'].unique()]
-        
-        # Take only the first 2 future quarters
-        next_two_quarters = future_quarters[:2]
+        # Forecast for the first two quarters not yet in the actuals, sorted by highest forecast
+        forecast_summary = load_output("forecast_summary")
         
-        if len(next_two_quarters) == 0:
+        if forecast_summary.empty:
             st.info("No future forecast quarters available in the dataset.")
         else:
-            # Step 2: Filter forecast for next 2 quarters
-            next_forecast = forecast_df[forecast_df['Quarter'].isin(next_two_quarters)]
-            
-            # Step 3: Aggregate by Country, Quarter, and Model
-            forecast_summary = (
-                next_forecast
-                .groupby(['Country', 'Quarter', 'Bike_Model'])['Predicted_Units']
-                .sum()
-                .reset_index()
-                .rename(columns={'Predicted_Units': 'Forecast_Units'})
-            )
-            
-            # Step 4: Sort by highest forecast
-            forecast_summary = forecast_summary.sort_values('Forecast_Units', ascending=False)
-
             st.dataframe(forecast_summary)#.style.apply(highlight_top_models, axis=1))
 
+        # Kept up to date by actuals.append_quarter as each quarter's actuals arrive
+        forecast_accuracy = load_output("forecast_accuracy")
+        if not forecast_accuracy.empty:
+            st.markdown("**Forecast accuracy so far (MAPE vs recorded actuals)**")
+            st.dataframe(forecast_accuracy, hide_index=True)
+
         
     with st.expander("📋 Analysis Tab"):
         st.markdown("""
@@ -96,95 +85,32 @@ with tab1:
     # === Moved filter + graph section out of expander for better UX ===
         st.markdown("### 📊 Export Sales Performance (Past + Forecast)")
     
-        # Create new column layout for filters
-        col1, col2 = st.columns(2)
-    
-        with col1:
-            select_all_countries = st.checkbox("Select All Countries", value=True)
-            countries = merged_df['Country'].unique()
-            selected_country = st.multiselect(
-                "Select Country",
-                options=countries,
-                default=countries if select_all_countries else None
-            )
-    
-        with col2:
-            select_all_models = st.checkbox("Select All Bike Models", value=True)
-            models = merged_df['Bike_Model'].unique()
-            selected_bike_model = st.multiselect(
-                "Select Bike Model",
-                options=models,
-                default=models if select_all_models else None
-            )
-            # # Filter the merged_df based on selections
-        merged_df['Performance_Type'] = merged_df['A_F'].map({'A': 'Actual', 'F': 'Forecast'})
-        filtered_df = merged_df[
-            (merged_df['Country'].isin(selected_country)) &
-            (merged_df['Bike_Model'].isin(selected_bike_model))
-        ]
-    # --- Summarize data at Quarter + Performance_Type level ---
-        summary_df = (
-            filtered_df
-            .groupby(['Quarter', 'Performance_Type'])['Sales_Units']
-            .sum()
-            .reset_index()
-        )
-        
-        # Sort quarters correctly
-        def quarter_sort_key(q):
-            qtr, year = q.split('-')
-            return int(year) * 4 + int(qtr[1])
-        
-        summary_df['Quarter_Sort'] = summary_df['Quarter'].apply(quarter_sort_key)
-        summary_df = summary_df.sort_values('Quarter_Sort')
-        
-        # --- Plotly grouped bar chart ---
-        fig = px.bar(
-            summary_df,
-            x='Quarter',
-            y='Sales_Units',
-            color='Performance_Type',
-            barmode='group',
-            color_discrete_map={'Actual': '#1f77b4', 'Forecast': '#ff7f0e'},
-            text='Sales_Units'  # This shows one number per bar
-        )
-        
-        fig.update_traces(
-            textposition='outside',
-            marker_line_width=0
-        )
-        
-        fig.update_layout(
-            title="Quarter-wise Export Sales Performance (Total Actual vs Forecast)",
-            xaxis_title="Quarter",
-            yaxis_title="Sales Units",
-            legend_title_text="Performance Type",
-            template="plotly_white",
-            bargap=0.2,
-            xaxis=dict(showgrid=False),
-            yaxis=dict(showgrid=False)
-        )
-        
-        # --- Display chart ---
-        st.plotly_chart(fig, use_container_width=True)
+        # Filters + chart rerun on their own as a fragment
+        render_performance_chart()
 
         
                 
         st.subheader("📉 Growth vs Decline Zones")
-        growth_df = sales_df.groupby(["Country", "Quarter"])["Sales_Units"].sum().reset_index()
-        pivot = growth_df.pivot(index="Quarter", columns="Country", values="Sales_Units").fillna(0)
-        growth_rate = pivot.pct_change().mean().sort_values(ascending=False).reset_index()
-        growth_rate.columns = ["Country", "Avg Growth Rate"]
+        growth_rate = load_output("growth_rates")
         st.dataframe(growth_rate)
-        fig = px.bar(growth_rate, x="Country", y="Avg Growth Rate", color="Avg Growth Rate", title="Avg Quarterly Growth Rate (actuals)")
-        st.plotly_chart(fig, use_container_width=True)
+        # Figure JSON is memoised per growth_rates data version
+        plotly_chart(
+            "growth_rates", None, output_version("growth_rates"),
+            lambda: px.bar(growth_rate, x="Country", y="Avg Growth Rate", color="Avg Growth Rate", title="Avg Quarterly Growth Rate (actuals)"),
+            use_container_width=True
+        )
+
+        # Trailing-window growth per series at each level, ranked by trend; gaps are skipped, not zero-filled
+        growth_zones = load_output("growth_zones")
+        level = st.selectbox("Series level", growth_zones["Level"].unique(), key="growth_level")
+        level_zones = growth_zones[growth_zones["Level"] == level].dropna(axis=1, how="all")
+        st.dataframe(level_zones.drop(columns="Level"), hide_index=True)
 
-        
-        
-       
     
 # ================= Tab 2: Distributor Analysis =================
-with tab2:
+if active_section == SECTIONS[1]:
+    from plotly import express as px
+
     with st.expander("🤖 Distributor Evaluation Engine"):
         st.markdown("""
         **AI Engine Role:** It uses the CLUSTERING AI MODEL to seggregate the clusters of distributors. Assists business teams in interpreting distributor performance, and identify high potential distributors. 
@@ -203,15 +129,25 @@ with tab2:
         st.image("assets/KPI Compute.png", width=900)
 
         
-        cluster_label = {0: "High Potential Distributor", 1: "Very Good Potential Distributor", 2: "Average Potential Distributor"}
-        cluster_df['Cluster_Labels'] = cluster_df['Cluster'].map(cluster_label)
+        # Segments recomputed whenever Distributor_Data changes; labels follow centroid rank.
+        # Weighted scores are cached per weight set and data version, so each country is an indexed slice
         st.subheader("🥇 KPIs for High Potential Distributors")
-        high_df = cluster_df[cluster_df['Cluster_Labels'] == "High Potential Distributor"]
-        available_countries = sorted(high_df['Country'].dropna().unique())
-        selected_country = st.selectbox("🌍 Select Country", available_countries, key="high_potential_country")
-        country_high_df = high_df[high_df['Country'] == selected_country]
-        cols_to_show = ['Distributor_Name', 'Country', 'Cluster_Labels', 'KPI_Score', 'Engagement_Score', 'Lead_Time_Compliance', 'Return_Rate', 'Exclusive']
-        st.dataframe(country_high_df[cols_to_show])
+        weight_cols = st.columns(len(SCORE_WEIGHTS))
+        weights = {
+            metric: col.slider(metric, 0.0, 1.0, default, 0.05, key=f"score_weight_{metric}")
+            for col, (metric, default) in zip(weight_cols, SCORE_WEIGHTS.items())
+        }
+        if sum(weights.values()) <= 0:
+            st.warning("Set at least one weight above zero.")
+            weights = SCORE_WEIGHTS
+        scores = instrumentation.measure("distributor_scores", startup.timed, "data_load", distributor_scores, weights)
+        # Only countries that have a High Potential distributor to show
+        available_countries = high_potential_countries(scores)
+        if not available_countries:
+            st.info("No High Potential distributors in the current data.")
+        else:
+            selected_country = st.selectbox("🌍 Select Country", available_countries, key="high_potential_country")
+            st.dataframe(high_potential(scores, selected_country), hide_index=True)
         
     with st.expander("📋 Distributor Segmentation"):
         st.markdown("""
@@ -220,42 +156,45 @@ with tab2:
 
         st.subheader("📦 Distributor Segmentation")
 
-        cluster_summary = cluster_df['Cluster_Labels'].value_counts().reset_index()
-        cluster_summary.columns = ['Cluster_Labels', 'Count']
+        cluster_summary = load_output("segment_summary")
         st.dataframe(cluster_summary)
-        # fig = px.pie(cluster_summary, names='Cluster_Label', values='Count', title='Distributor Segmentation')
-        fig = px.pie(
-            cluster_summary,
-            names="Cluster_Labels",
-            values="Count",
-            title="Distributor Segmentation by Potential",
-            hole=0.4  # if you're using a donut
-        )
+
+        def build_segment_pie():
+            # fig = px.pie(cluster_summary, names='Cluster_Label', values='Count', title='Distributor Segmentation')
+            fig = px.pie(
+                cluster_summary,
+                names="Cluster_Labels",
+                values="Count",
+                title="Distributor Segmentation by Potential",
+                hole=0.4  # if you're using a donut
+            )
         
-        fig.update_traces(
-            textinfo='percent+label',
-            textposition='inside'
-        )
+            fig.update_traces(
+                textinfo='percent+label',
+                textposition='inside'
+            )
         
-        fig.update_layout(
-            height=400,              # Shrinks total vertical height
-            width=500,               # Optional: Shrinks horizontal spread
-            margin=dict(t=40, b=40, l=10, r=10),  # Reduce outer padding
-            legend=dict(
-                orientation="v",
-                yanchor="top",
-                y=1,
-                xanchor="left",
-                x=1.05,  # Push legend close to pie
-                font=dict(size=10)
+            fig.update_layout(
+                height=400,              # Shrinks total vertical height
+                width=500,               # Optional: Shrinks horizontal spread
+                margin=dict(t=40, b=40, l=10, r=10),  # Reduce outer padding
+                legend=dict(
+                    orientation="v",
+                    yanchor="top",
+                    y=1,
+                    xanchor="left",
+                    x=1.05,  # Push legend close to pie
+                    font=dict(size=10)
+                )
             )
-        )
+            return fig
 
-        
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart("segment_pie", None, output_version("segment_summary"), build_segment_pie, use_container_width=True)
 
 # ================= Tab 3: Competitor Analysis =================
-with tab3:
+if active_section == SECTIONS[2]:
+    from plotly import express as px
+
     with st.expander("🤖 Competitor Analysis Engine"):
         st.markdown("""
         **AI Agent Role:** Scrapes web data, static interview data, social media ads etc, to develop insights using AI-NLP engine to get competitor dynamics.
@@ -267,20 +206,22 @@ with tab3:
 
         st.subheader("🥧 Overall Competitor Market Share")
         
-        # Aggregate total market share
-        overall_market_share = swot_df.groupby("Competitor")["Market_Share_%"].sum().reset_index()
-        
-        # Create pie chart
-        fig = px.pie(
-            overall_market_share,
-            names="Competitor",
-            values="Market_Share_%",
-            title="🧭 Overall Market Share by Competitor",
-            hole=0.3
-        )
-        fig.update_traces(textposition='inside', textinfo='percent+label')
+        def build_market_share_pie():
+            # Aggregate total market share
+            overall_market_share = load_output("market_share")
+            
+            # Create pie chart
+            fig = px.pie(
+                overall_market_share,
+                names="Competitor",
+                values="Market_Share_%",
+                title="🧭 Overall Market Share by Competitor",
+                hole=0.3
+            )
+            fig.update_traces(textposition='inside', textinfo='percent+label')
+            return fig
         
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart("market_share_pie", None, output_version("market_share"), build_market_share_pie, use_container_width=True)
 
         
     with st.expander("📋 Analysis Tab"):
@@ -288,6 +229,9 @@ with tab3:
            Using NLP and text analytics, extract insights on product launches, pricing, promotional strategies, and market messaging. Generate a strengths-and-weaknesses map for each competitor, helping us understand where we can win.
             """)
      
+        st.subheader("🔎 Search competitor SWOT text")
+        render_swot_search()
+
         st.subheader("📊 Competitor strength & weakness map")
 
         st.image("assets/Suzuki_SWOT_Card.png", width=500)
@@ -297,7 +241,7 @@ with tab3:
         st.image("assets/Honda_SWOT_Card.png", width=500)
     
 # ================= Tab 4: Forecast Pricing Simulator =================
-with tab4:
+if active_section == SECTIONS[3]:
     with st.expander("🤖 Pricing Forecast Simulator"):
         st.markdown("""
         **AI Engine Role:** Apply ELASTICITY FEEDER AI MODEL to determine the price elasticity by country and model. Compute Competitive intensity by country. Generate the adjusted forecast taking these two computed values into account.
@@ -312,10 +256,8 @@ with tab4:
         Compute price elasticity using historical pricing and applying the Log linear Regression model
         """)
         # --- Filter Columns to Display ---
-        display_df = Elastic_df[["Country", "Bike_Model", "Elasticity"]]
-
-        # --- Optional Sorting ---
-        display_df = display_df.sort_values(by=["Country", "Bike_Model"])
+        # (already sorted by Country, Bike_Model)
+        display_df = load_output("elasticity_table")
         # Inject CSS to shrink column widths
         st.markdown("""
             <style>
@@ -338,11 +280,7 @@ with tab4:
         * Computed competitor intensity by Country, calculated as an average of competitive intensity of top 3 competitors
         """)
         # --- Filter Columns to Display ---
-        display_df = Elastic_df[["Country", "Comp_Intensity"]]
-        display_df = display_df.drop_duplicates()
-
-        # --- Optional Sorting ---
-        display_df = display_df.sort_values(by=["Country"])
+        display_df = load_output("country_intensity")
 
         # Inject CSS to shrink column widths
         st.markdown("""
@@ -363,7 +301,7 @@ with tab4:
         render_forecast_simulator()
 
 # --- Tab 5: Power BI Dashboard ---
-with tab5:
+if active_section == SECTIONS[4]:
     # Theme adaptive slide: semi-transparent bg + dark text with shadow
     st.markdown(
         """
@@ -435,6 +373,8 @@ with tab5:
         unsafe_allow_html=True
     )
 
+# Opt-in (GTM_INSTRUMENT=1) stage timing / memory panel for admins, with the data watcher's status
+instrumentation.render_panel(data_watcher.status if WATCH_ENABLED else None)
 
-
-
+startup.mark(startup.RENDER_PHASE)
+startup.finish()
@@ -0,0 +1,138 @@
+# backtesting.py
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from data_loader import DATA_DIR, read_dataset
+from forecasting import SERIES_KEYS, fit_series, project, stack_series, StackedSeries
+from periods import quarter_labels
+
+MIN_TRAIN = 3  # quarters of history required before the first forecast origin
+
+
+def _backtest_block(Y, start, periods, horizon, min_train):
+    """Rolling-origin errors for a block of series.
+
+    For every origin the model is refit on the history up to that origin and
+    scored on the next `horizon` quarters. Returns (origins, actual, predicted);
+    actual and predicted have shape (origins, series, horizon), NaN where unscored.
+    """
+    n_series, n_periods = Y.shape
+    origins = np.arange(min_train, n_periods)
+    actual = np.full((len(origins), n_series, horizon), np.nan)
+    predicted = np.full_like(actual, np.nan)
+    for o, origin in enumerate(origins):
+        train = StackedSeries(None, periods[:origin], Y[:, :origin], np.minimum(start, origin - 1))
+        forecast = project(fit_series(train), horizon)
+        steps = min(horizon, n_periods - origin)
+        actual[o, :, :steps] = Y[:, origin:origin + steps]
+        predicted[o, :, :steps] = forecast[:, :steps]
+        # Series that had not started by this origin have nothing to score
+        predicted[o, start >= origin] = np.nan
+    return origins, actual, predicted
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker(values_spec, start_spec, periods, lo, hi, horizon, min_train):
+    """Backtest rows lo:hi of the shared arrays; only the slice bounds are pickled."""
+    values_shm, values = _attach(values_spec)
+    start_shm, start = _attach(start_spec)
+    try:
+        return lo, _backtest_block(values[lo:hi], start[lo:hi], periods, horizon, min_train)
+    finally:
+        values_shm.close()
+        start_shm.close()
+
+
+def _share(array):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, (shm.name, array.shape, array.dtype)
+
+
+def backtest(sales_df, horizon=2, keys=SERIES_KEYS, min_train=MIN_TRAIN, workers=None, chunk_size=None):
+    """Rolling-origin evaluation of every series, split across a process pool.
+
+    The stacked history is placed in shared memory once; each worker maps it
+    and processes a contiguous range of series. Returns (per_origin, per_series):
+    per_origin has one row per series x origin x step with Actual_Units and
+    Predicted_Units; per_series has the MAPE (%) of each series.
+    """
+    stacked = stack_series(sales_df, keys)
+    n_series = len(stacked.keys)
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, -(-n_series // workers))
+    bounds = [(lo, min(lo + chunk_size, n_series)) for lo in range(0, n_series, chunk_size)]
+
+    if workers == 1 or len(bounds) == 1:
+        results = [(lo, _backtest_block(stacked.values[lo:hi], stacked.start[lo:hi], stacked.periods, horizon, min_train))
+                   for lo, hi in bounds]
+    else:
+        values_shm, values_spec = _share(stacked.values)
+        start_shm, start_spec = _share(stacked.start)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_worker, values_spec, start_spec, stacked.periods, lo, hi, horizon, min_train)
+                           for lo, hi in bounds]
+                results = [f.result() for f in futures]
+        finally:
+            for shm in (values_shm, start_shm):
+                shm.close()
+                shm.unlink()
+
+    origins = results[0][1][0] if results else np.empty(0, dtype=np.int64)
+    actual = np.concatenate([r[1][1] for r in results], axis=1) if results else np.empty((0, 0, horizon))
+    predicted = np.concatenate([r[1][2] for r in results], axis=1) if results else np.empty((0, 0, horizon))
+
+    o_idx, s_idx, h_idx = np.indices(actual.shape).reshape(3, -1)
+    keep = ~np.isnan(predicted.ravel())
+    per_origin = stacked.keys.iloc[s_idx[keep]].reset_index(drop=True)
+    per_origin["Origin_Period"] = stacked.periods[origins[o_idx[keep]] - 1]
+    per_origin["Quarter_Period"] = stacked.periods[origins[o_idx[keep]]] + h_idx[keep]
+    per_origin["Quarter"] = quarter_labels(per_origin["Quarter_Period"], compact=True)
+    per_origin["Step"] = h_idx[keep] + 1
+    per_origin["Actual_Units"] = actual.ravel()[keep].astype(np.int64)
+    per_origin["Predicted_Units"] = np.rint(predicted.ravel()[keep]).astype(np.int64)
+
+    per_series = stacked.keys.copy()
+    per_series["MAPE (%)"] = np.round(_mape(actual, predicted, axis=(0, 2)), 2)
+    per_series["N_forecasts"] = (~np.isnan(predicted) & (actual > 0)).sum(axis=(0, 2))
+    return per_origin, per_series
+
+
+def _mape(actual, predicted, axis=None):
+    scored = ~np.isnan(predicted) & (actual > 0)
+    ape = np.where(scored, np.abs(actual - predicted) / np.where(scored, actual, 1.0), 0.0)
+    with np.errstate(invalid="ignore"):
+        return ape.sum(axis=axis) / scored.sum(axis=axis) * 100
+
+
+def aggregate_mape(per_origin, by=("Step",)):
+    """MAPE (%) pooled over series, e.g. per forecast step or per Country."""
+    df = per_origin[per_origin["Actual_Units"] > 0]
+    ape = (df["Actual_Units"] - df["Predicted_Units"]).abs() / df["Actual_Units"]
+    return (ape * 100).groupby([df[c] for c in by], observed=True).mean().rename("MAPE (%)").reset_index()
+
+
+def forecast_with_mape(per_origin, per_series, keys=SERIES_KEYS):
+    """Backtest rows in the bajaj_forecast_with_actuals schema (MAPE taken per series)."""
+    merged = per_origin.merge(per_series[keys + ["MAPE (%)"]], on=keys, how="left")
+    return merged[keys + ["Quarter", "Predicted_Units", "MAPE (%)", "Actual_Units"]]
+
+
+if __name__ == "__main__":
+    # python backtesting.py [out_dir]  -> per-series and per-step MAPE tables
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DATA_DIR, "backtest")
+    per_origin, per_series = backtest(read_dataset("sales"))
+    os.makedirs(out_dir, exist_ok=True)
+    forecast_with_mape(per_origin, per_series).to_csv(os.path.join(out_dir, "backtest_forecasts.csv"), index=False)
+    per_series.to_csv(os.path.join(out_dir, "backtest_series_mape.csv"), index=False)
+    aggregate_mape(per_origin).to_csv(os.path.join(out_dir, "backtest_step_mape.csv"), index=False)
@@ -0,0 +1,173 @@
+# benchmark.py
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from clustering import segment_distributors
+from cube import build_performance_cube, performance_summary
+from data_loader import prepare
+from elasticity import build_elasticity_index, estimate_elasticities
+from growth import growth_statistics, level_totals
+from intensity import country_intensity, intensity_by_country
+from periods import parse_quarters
+from pipeline import competitor_market_share, growth_rates, next_quarter_forecast, simulator_grid
+from scenarios import build_forecast_book
+from scoring import score_distributors
+from streaming import summarise_sales
+from synthetic import SCALES, generate, price_history
+from text_index import build_swot_index, search, term_frequencies
+from uncertainty import simulate_scenarios
+
+BASELINE = "benchmark_baseline.json"
+DEFAULT_SCALES = ["sample", "100k", "1m"]
+# A stage regresses when slower than baseline by this factor and by at least MIN_DELTA seconds
+TOLERANCE = 1.5
+MIN_DELTA = 0.005
+# Extra runs of a stage that looks regressed; it is judged on their median, so one noisy run does not fail the check
+CONFIRM_REPEATS = 7
+
+
+# --- Stages: name -> fn(ctx); each result is stored in ctx under the stage name ---
+def _simulator_pair(ctx):
+    params = ctx["forecast_book"].params.iloc[[0]]
+    scenario = params[["Country", "Bike_Model"]].assign(New_Price=params["Base_Price"].to_numpy() * 1.05)
+    return simulate_scenarios(ctx["forecast_book"], scenario)
+
+
+STAGES = {
+    "parse_quarters": lambda ctx: parse_quarters(ctx["raw"]["sales"]["Quarter"]),
+    "prepare_datasets": lambda ctx: {name: prepare(df.copy()) for name, df in ctx["raw"].items()},
+    "forecast_summary": lambda ctx: next_quarter_forecast(ctx["data"]["forecast"], ctx["data"]["sales"]),
+    "performance_cube": lambda ctx: build_performance_cube(ctx["data"]["merged"]),
+    "performance_summary": lambda ctx: performance_summary(
+        ctx["performance_cube"], ctx["performance_cube"].countries, ctx["performance_cube"].models),
+    "growth_rates": lambda ctx: growth_rates(ctx["data"]["sales"]),
+    "sales_aggregates": lambda ctx: summarise_sales([ctx["data"]["sales"]]),
+    "growth_zones": lambda ctx: growth_statistics(level_totals(ctx["sales_aggregates"])),
+    "segment_distributors": lambda ctx: segment_distributors(ctx["data"]["distributor"], previous=ctx["data"]["clusters"]),
+    "distributor_scores": lambda ctx: score_distributors(ctx["segment_distributors"]),
+    "market_share": lambda ctx: competitor_market_share(ctx["data"]["swot"]),
+    "swot_index": lambda ctx: build_swot_index(ctx["data"]["swot"]),
+    "swot_search": lambda ctx: (search(ctx["swot_index"], "Affordable pricing", ["Strength"]),
+                                term_frequencies(ctx["swot_index"], top_n=5)),
+    "elasticity_index": lambda ctx: build_elasticity_index(ctx["data"]["elasticity"]),
+    "country_intensity": lambda ctx: country_intensity(ctx["data"]["swot"]),
+    "estimate_elasticities": lambda ctx: estimate_elasticities(
+        ctx["price_history"], comp_intensity=intensity_by_country(ctx["country_intensity"])),
+    "forecast_book": lambda ctx: build_forecast_book(ctx["data"]["monthly_forecast"], ctx["elasticity_index"],
+                                                     intensity_by_country(ctx["country_intensity"])),
+    "simulator_pair": _simulator_pair,
+    "simulator_grid": lambda ctx: simulator_grid(ctx["forecast_book"]),
+}
+
+
+def _time(fn, ctx):
+    start = time.perf_counter()
+    result = fn(ctx)
+    return result, time.perf_counter() - start
+
+
+def exceeds(base, seconds, tolerance=TOLERANCE, min_delta=MIN_DELTA):
+    """Whether seconds is slower than a baseline of base allows (never when there is no baseline)."""
+    return base is not None and seconds > base * tolerance and seconds - base > min_delta
+
+
+def run_scale(scale_name, repeats=3, seed=0, reference=None):
+    """Best-of-`repeats` seconds per stage on one synthetic scale.
+
+    A stage whose best time exceeds reference (stage -> baseline seconds) is
+    re-timed CONFIRM_REPEATS times and the median of those runs kept instead.
+    """
+    raw = generate(SCALES[scale_name], seed)
+    ctx = {"raw": raw, "data": {name: prepare(df.copy()) for name, df in raw.items()},
+           "price_history": price_history(SCALES[scale_name], seed)}
+    reference = reference or {}
+    timings = {}
+    for stage, fn in STAGES.items():
+        runs = [_time(fn, ctx) for _ in range(repeats)]
+        result, seconds = runs[0][0], min(t for _, t in runs)
+        if exceeds(reference.get(stage), seconds):
+            seconds = float(np.median([_time(fn, ctx)[1] for _ in range(CONFIRM_REPEATS)]))
+        ctx[stage] = result
+        timings[stage] = round(seconds, 6)
+    return {"rows": {name: len(df) for name, df in raw.items()}, "stages": timings}
+
+
+def run(scales=DEFAULT_SCALES, repeats=3, seed=0, baseline=None):
+    reference = (baseline or {}).get("scales", {})
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+        },
+        "scales": {name: run_scale(name, repeats, seed, reference.get(name, {}).get("stages")) for name in scales},
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE, min_delta=MIN_DELTA):
+    """(scale, stage, baseline_s, current_s) for every stage slower than the baseline allows."""
+    regressions = []
+    for scale, current in results["scales"].items():
+        reference = baseline.get("scales", {}).get(scale, {}).get("stages", {})
+        for stage, seconds in current["stages"].items():
+            if exceeds(reference.get(stage), seconds, tolerance, min_delta):
+                regressions.append((scale, stage, reference[stage], seconds))
+    return regressions
+
+
+def merge_baseline(baseline, results, stages=None):
+    """baseline with results' scales recorded in it; only the named stages of each scale when stages is given."""
+    merged = dict(results, scales=dict((baseline or {}).get("scales", {})))
+    for scale, result in results["scales"].items():
+        previous = merged["scales"].get(scale)
+        if stages and previous:
+            recorded = {stage: result["stages"][stage] for stage in stages}
+            result = dict(previous, stages={**previous["stages"], **recorded})
+        merged["scales"][scale] = result
+    return merged
+
+
+def load_baseline(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every hub computation on synthetic data at several scales.")
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=DEFAULT_SCALES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update", nargs="*", choices=STAGES, metavar="STAGE",
+                        help="record this run's scales in the baseline (other scales are kept); "
+                             "with stage names, only those stages (e.g. the ones a change touched)")
+    args = parser.parse_args()
+
+    updating = args.update is not None
+    baseline = load_baseline(args.baseline)
+    if baseline is None and not updating:
+        sys.exit(f"no baseline at {args.baseline}; run with --update to record one")
+    results = run(args.scales, args.repeats, baseline=None if updating else baseline)
+    for scale, result in results["scales"].items():
+        print(f"== {scale} ({result['rows']['sales']} sales rows)")
+        for stage, seconds in result["stages"].items():
+            print(f"  {stage:<22} {seconds * 1000:10.1f} ms")
+
+    if updating:
+        with open(args.baseline, "w") as fh:
+            json.dump(merge_baseline(baseline, results, args.update), fh, indent=2)
+        print(f"baseline written to {args.baseline}")
+        sys.exit(0)
+    regressions = compare(results, baseline)
+    for scale, stage, base, seconds in regressions:
+        print(f"REGRESSION {scale}/{stage}: {base * 1000:.1f} ms -> {seconds * 1000:.1f} ms")
+    sys.exit(1 if regressions else 0)
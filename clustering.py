@@ -0,0 +1,139 @@
+# clustering.py
+from typing import NamedTuple
+
+import numpy as np
+import streamlit as st
+
+from data_loader import VERSIONS_KEPT, load_version, served_version
+
+FEATURES = [
+    "Total_Orders", "Revenue_INR", "Sales_Growth_%", "Engagement_Score",
+    "KPI_Score", "Return_Rate", "Lead_Time_Compliance", "Num_Subdealers",
+]
+# Direction of each feature when ranking centroids: higher is better except returns
+FEATURE_SIGNS = np.array([1, 1, 1, 1, 1, -1, 1, 1], dtype=np.float64)
+
+# Cluster id == rank of its centroid, best first
+CLUSTER_LABELS = ["High Potential Distributor", "Very Good Potential Distributor", "Average Potential Distributor"]
+
+
+class Clustering(NamedTuple):
+    labels: np.ndarray      # cluster id per distributor, 0 = best centroid
+    centroids: np.ndarray   # standardised feature space, row i = cluster i
+    mean: np.ndarray        # standardisation parameters used for the features
+    scale: np.ndarray
+    n_iter: int
+
+
+def standardise(X, mean=None, scale=None):
+    mean = X.mean(axis=0) if mean is None else mean
+    scale = X.std(axis=0) if scale is None else scale
+    scale = np.where(scale > 0, scale, 1.0)
+    return (X - mean) / scale, mean, scale
+
+
+def _sq_distances(X, centroids):
+    """Squared Euclidean distance of every row to every centroid, shape (n, k)."""
+    d = (X * X).sum(axis=1)[:, None] - 2.0 * X @ centroids.T + (centroids * centroids).sum(axis=1)[None, :]
+    return np.maximum(d, 0.0)
+
+
+def _cluster_sums(X, labels, k):
+    """Per-cluster feature sums, one bincount per feature column."""
+    return np.column_stack([np.bincount(labels, weights=X[:, j], minlength=k) for j in range(X.shape[1])])
+
+
+def _kmeans_plus_plus(X, k, rng):
+    centroids = np.empty((k, X.shape[1]))
+    centroids[0] = X[rng.integers(len(X))]
+    closest = _sq_distances(X, centroids[:1])[:, 0]
+    for i in range(1, k):
+        total = closest.sum()
+        idx = rng.choice(len(X), p=closest / total) if total > 0 else rng.integers(len(X))
+        centroids[i] = X[idx]
+        closest = np.minimum(closest, _sq_distances(X, centroids[i:i + 1])[:, 0])
+    return centroids
+
+
+def kmeans(X, k, init=None, max_iter=100, tol=1e-6, seed=0):
+    """Lloyd's k-means with every step vectorised over rows; init warm-starts from given centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = _kmeans_plus_plus(X, k, rng) if init is None else np.array(init, dtype=np.float64)
+    labels = np.zeros(len(X), dtype=np.int64)
+    for n_iter in range(1, max_iter + 1):
+        dist = _sq_distances(X, centroids)
+        labels = dist.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = _cluster_sums(X, labels, k)
+        new_centroids = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centroids)
+        # Re-seed empty clusters on the points furthest from their centroid
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            far = np.argsort(dist[np.arange(len(X)), labels])[::-1][:len(empty)]
+            new_centroids[empty[:len(far)]] = X[far]
+        shift = ((new_centroids - centroids) ** 2).sum()
+        centroids = new_centroids
+        if shift <= tol:
+            break
+    labels = _sq_distances(X, centroids).argmin(axis=1)
+    return labels, centroids, n_iter
+
+
+def rank_clusters(labels, centroids):
+    """Renumber clusters so 0 has the best signed centroid score."""
+    order = np.argsort(-(centroids @ FEATURE_SIGNS), kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[labels], centroids[order]
+
+
+def centroids_from_labels(X, labels, k):
+    """Centroids implied by an existing assignment, used to warm-start a refresh."""
+    counts = np.bincount(labels, minlength=k)
+    sums = _cluster_sums(X, labels, k)
+    return sums / np.maximum(counts, 1)[:, None]
+
+
+def cluster_distributors(distributor_df, k=len(CLUSTER_LABELS), init=None, seed=0):
+    """Standardise FEATURES and run k-means; clusters are ranked best-first."""
+    raw = distributor_df[FEATURES].to_numpy(dtype=np.float64)
+    X, mean, scale = standardise(raw)
+    labels, centroids, n_iter = kmeans(X, k, init=init, seed=seed)
+    labels, centroids = rank_clusters(labels, centroids)
+    return Clustering(labels, centroids, mean, scale, n_iter)
+
+
+def segment_distributors(distributor_df, previous=None):
+    """distributor_df with Cluster and Cluster_Labels columns.
+
+    previous is an earlier segmentation (same columns); its clusters seed the
+    centroids so a refresh converges in a few iterations.
+    """
+    init = None
+    if previous is not None and "Cluster" in previous.columns:
+        prev_raw = previous[FEATURES].to_numpy(dtype=np.float64)
+        prev_labels = previous["Cluster"].to_numpy(dtype=np.int64)
+        _, mean, scale = standardise(distributor_df[FEATURES].to_numpy(dtype=np.float64))
+        X_prev, _, _ = standardise(prev_raw, mean, scale)
+        k = len(CLUSTER_LABELS)
+        if prev_labels.min() >= 0 and prev_labels.max() < k:
+            init = centroids_from_labels(X_prev, prev_labels, k)
+    result = cluster_distributors(distributor_df, init=init)
+    segmented = distributor_df.copy()
+    segmented["Cluster"] = result.labels
+    segmented["Cluster_Labels"] = np.asarray(CLUSTER_LABELS)[result.labels]
+    return segmented
+
+
+@st.cache_data(show_spinner=False, max_entries=VERSIONS_KEPT)
+def _distributor_segments(distributor_version, clusters_version):
+    return segment_distributors(load_version("distributor", distributor_version),
+                                previous=load_version("clusters", clusters_version))
+
+
+def distributor_segments(versions=None):
+    """Distributor segmentation for the served Distributor_Data, warm-started from distributor_clusters.
+
+    versions (dataset name -> fingerprint) overrides the served versions.
+    """
+    return _distributor_segments(served_version("distributor", versions), served_version("clusters", versions))
@@ -0,0 +1,78 @@
+# cube.py
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import VERSIONS_KEPT, check_version, served_version
+from periods import quarter_labels
+from streaming import aggregate_csv
+
+PERFORMANCE_TYPES = np.array(["Actual", "Forecast"])
+_A_F_CODES = {"A": 0, "F": 1}
+
+
+class PerformanceCube(NamedTuple):
+    countries: np.ndarray   # axis 0 labels
+    models: np.ndarray      # axis 1 labels
+    periods: np.ndarray     # axis 2 quarter codes, ascending
+    units: np.ndarray       # Sales_Units summed per (country, model, period, A/F)
+    observed: np.ndarray    # True where at least one source row landed in the cell
+
+
+def build_performance_cube(merged_df):
+    """Aggregate Merged data into a dense Country x Bike_Model x Quarter x A/F array."""
+    af = merged_df["A_F"].map(_A_F_CODES)
+    df = merged_df[af.notna()]
+    af = af[af.notna()].to_numpy(dtype=np.int64)
+
+    country = pd.Categorical(df["Country"])
+    model = pd.Categorical(df["Bike_Model"])
+    periods, period_idx = np.unique(df["Quarter_Period"].to_numpy(), return_inverse=True)
+
+    shape = (len(country.categories), len(model.categories), len(periods), len(PERFORMANCE_TYPES))
+    flat = np.ravel_multi_index((country.codes, model.codes, period_idx, af), shape)
+    size = int(np.prod(shape))
+    units = np.bincount(flat, weights=df["Sales_Units"].to_numpy(dtype=np.float64), minlength=size)
+    counts = np.bincount(flat, minlength=size)
+
+    return PerformanceCube(
+        countries=np.asarray(country.categories),
+        models=np.asarray(model.categories),
+        periods=periods,
+        units=np.rint(units).astype(np.int64).reshape(shape),
+        observed=(counts > 0).reshape(shape),
+    )
+
+
+def performance_summary(cube, countries, models):
+    """Quarter x Performance_Type totals for the selected countries and models."""
+    ci = np.flatnonzero(np.isin(cube.countries, list(countries)))
+    mi = np.flatnonzero(np.isin(cube.models, list(models)))
+    block = np.ix_(ci, mi)
+    totals = cube.units[block].sum(axis=(0, 1))          # (period, A/F)
+    present = cube.observed[block].any(axis=(0, 1))
+
+    period_idx, type_idx = np.nonzero(present)
+    summary = pd.DataFrame({
+        "Quarter_Period": cube.periods[period_idx],
+        "Performance_Type": PERFORMANCE_TYPES[type_idx],
+        "Sales_Units": totals[period_idx, type_idx],
+    })
+    summary["Quarter"] = quarter_labels(summary["Quarter_Period"])
+    return summary
+
+
+# One shared array per version instead of an unpickled copy per filter change; treat it as read-only
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT)
+def _performance_cube(version):
+    # Built from streamed per-cell totals, so the raw Merged table is never held in memory
+    totals, _ = aggregate_csv(version[0], ["Country", "Bike_Model", "Quarter_Period", "A_F"])
+    check_version(version)
+    return build_performance_cube(totals)
+
+
+def performance_cube(versions=None):
+    """Performance cube for the served version of Merged data (or versions["merged"]), built once per version."""
+    return _performance_cube(served_version("merged", versions))
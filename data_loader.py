@@ -0,0 +1,243 @@
+# data_loader.py
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import streamlit as st
+
+from periods import add_period_columns
+
+DATA_DIR = "data"
+SNAPSHOT_DIR = os.path.join(DATA_DIR, ".snapshots")
+
+# --- Dataset name -> file under DATA_DIR ---
+DATASETS = {
+    "sales": "Sales_Data.csv",
+    "distributor": "Distributor_Data.csv",
+    "forecast": "bajaj_forecast_with_actuals.csv",
+    "merged": "Merged data.csv",
+    "clusters": "distributor_clusters.csv",
+    "swot": "Competitor_SWOT_Data.csv",
+    "elasticity": "Adj_Price_Elasticity.csv",
+    "monthly_forecast": "bajaj_monthly_forecast_with_mape.csv",
+}
+
+# Line endings the source files were exported with (anything else uses "\n")
+LINE_TERMINATORS = {"sales": "\r", "distributor": "\r", "swot": "\r", "merged": "\r\n", "elasticity": "\r\n"}
+
+# --- Compact dtypes applied to every dataset ---
+CATEGORICAL_COLUMNS = ["Country", "Bike_Model", "Distributor", "Competitor", "Quarter"]
+INTEGER_COLUMNS = ["Sales_Units", "Predicted_Units", "Actual_Units", "Total_Orders", "Num_Subdealers", "N_obs"]
+
+_SOURCE_KEY = b"gtm_source"
+# Bump when the derived columns/dtypes change so older snapshots count as stale
+SNAPSHOT_VERSION = 2
+
+# (path, mtime_ns, size) -> content digest, so a file is only hashed when its stat changes
+_digests = {}
+HASH_BLOCK = 1 << 20  # files are hashed in blocks of this many bytes, never read whole
+
+# Version-keyed caches hold the version sessions are served plus the one being rebuilt;
+# older entries are evicted, which is how a superseded version gets invalidated
+VERSIONS_KEPT = 2
+
+# Dataset name -> fingerprint sessions are served while a watcher is running (see watcher.py)
+_published = {}
+
+
+class StaleVersionError(RuntimeError):
+    """A dataset file no longer is the version that was asked for (it was replaced while being read)."""
+
+
+def dataset_path(name):
+    return os.path.join(DATA_DIR, DATASETS[name])
+
+
+def snapshot_path(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(SNAPSHOT_DIR, stem + ".arrow")
+
+
+def file_digest(path, block_size=HASH_BLOCK):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(path):
+    """Return (path, mtime_ns, size, content digest) identifying the current version of a file."""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _digests.get(key)
+    if digest is None:
+        # A fresh snapshot already records the digest for this exact stat
+        source = _snapshot_source(snapshot_path(path))
+        if source and (source["mtime_ns"], source["size"]) == key[1:]:
+            digest = source["digest"]
+        else:
+            digest = file_digest(path)
+        # Drop digests of older versions of the same file
+        for stale in [k for k in list(_digests) if k[0] == path]:
+            _digests.pop(stale, None)
+        _digests[key] = digest
+    return key + (digest,)
+
+
+def check_version(file_fingerprint):
+    """Raise StaleVersionError unless the file on disk still is file_fingerprint."""
+    if fingerprint(file_fingerprint[0]) != tuple(file_fingerprint):
+        raise StaleVersionError(f"{file_fingerprint[0]} changed while version {file_fingerprint[3][:12]} was read")
+
+
+def compact_dtypes(df):
+    """Store label columns as categoricals and unit counts in the smallest integer dtype."""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in INTEGER_COLUMNS:
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def prepare(df):
+    """Apply the loader's column cleanup, compact dtypes and period codes to a raw frame."""
+    df.columns = df.columns.str.strip()
+    return add_period_columns(compact_dtypes(df))
+
+
+def _read_source(path):
+    return prepare(pd.read_csv(path))
+
+
+# --- Arrow snapshots ---
+def _snapshot_source(snap_path):
+    """Return the source-file fingerprint recorded in a snapshot, or None."""
+    try:
+        with pa.memory_map(snap_path) as source:
+            schema = pa.ipc.open_file(source).schema
+    except (OSError, pa.ArrowInvalid):
+        return None
+    raw = (schema.metadata or {}).get(_SOURCE_KEY)
+    return json.loads(raw) if raw else None
+
+
+def write_snapshot(path, df, file_fingerprint):
+    """Write df as an uncompressed Arrow IPC file so it can be memory-mapped on load."""
+    _, mtime_ns, size, digest = file_fingerprint
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    source = json.dumps({"mtime_ns": mtime_ns, "size": size, "digest": digest, "version": SNAPSHOT_VERSION}).encode()
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), _SOURCE_KEY: source})
+    snap_path = snapshot_path(path)
+    os.makedirs(os.path.dirname(snap_path), exist_ok=True)
+    tmp_path = snap_path + ".tmp"
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, snap_path)
+
+
+def _read_snapshot(path, file_fingerprint):
+    """Return the snapshot for path as a DataFrame (read through a memory map, no CSV parse), or None when stale."""
+    snap_path = snapshot_path(path)
+    source = _snapshot_source(snap_path)
+    if not source or source["digest"] != file_fingerprint[3] or source.get("version") != SNAPSHOT_VERSION:
+        return None
+    return feather.read_table(snap_path, memory_map=True).to_pandas()
+
+
+def ingest(name):
+    """Convert one dataset's CSV into its Arrow snapshot."""
+    path = dataset_path(name)
+    write_snapshot(path, _read_source(path), fingerprint(path))
+
+
+def _read(path, file_fingerprint):
+    df = _read_snapshot(path, file_fingerprint)
+    if df is None:
+        df = _read_source(path)
+        # Only a parse of exactly this version may be served (or snapshotted) under its fingerprint
+        check_version(file_fingerprint)
+        try:
+            write_snapshot(path, df, file_fingerprint)
+        except OSError:
+            pass  # Read-only data dir: keep serving from the CSV
+    return df
+
+
+# A resource cache hands every session the same frame instead of unpickling a copy per access;
+# loaded datasets are shared and must be treated as read-only (copy before modifying)
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT * len(DATASETS))
+def _load(path, file_fingerprint):
+    return _read(path, file_fingerprint)
+
+
+def read_dataset(name):
+    """Uncached load for batch jobs running outside Streamlit."""
+    path = dataset_path(name)
+    return _read(path, fingerprint(path))
+
+
+def factorize_keys(df, keys):
+    """Dense group id per row for a multi-column key, plus one row per distinct key.
+
+    Each column is factorised on its own and the codes combined arithmetically,
+    which avoids building a tuple per row the way MultiIndex.factorize does.
+    """
+    codes, uniques = zip(*(pd.factorize(df[k]) for k in keys))
+    shape = tuple(max(len(u), 1) for u in uniques)
+    flat = np.ravel_multi_index(codes, shape) if len(df) else np.empty(0, dtype=np.int64)
+    distinct, group = np.unique(flat, return_inverse=True)
+    parts = np.unravel_index(distinct, shape)
+    key_frame = pd.DataFrame({k: np.asarray(u, dtype=object)[p] for k, u, p in zip(keys, uniques, parts)})
+    return group, key_frame
+
+
+def current_version(name):
+    """Fingerprint of the dataset file as it is on disk right now."""
+    return fingerprint(dataset_path(name))
+
+
+def dataset_version(name):
+    """Fingerprint to key caches of derived artifacts with.
+
+    The published (last fully rebuilt) version while a watcher is running,
+    otherwise the file on disk.
+    """
+    return _published.get(name) or current_version(name)
+
+
+def served_version(name, versions=None):
+    """versions[name] when given (name -> fingerprint, e.g. a watcher rebuild), else dataset_version(name)."""
+    return (versions or {}).get(name) or dataset_version(name)
+
+
+def publish(versions):
+    """Serve these dataset versions (name -> fingerprint) from now on."""
+    _published.update(versions)
+
+
+def load_dataset(name):
+    """Load a dataset by name; re-parsed only when the underlying file changes. The frame is shared: do not mutate it."""
+    path = dataset_path(name)
+    return _load(path, fingerprint(path))
+
+
+def load_version(name, version):
+    """Load exactly this version (fingerprint) of a dataset, e.g. the one a watcher rebuild captured.
+
+    Raises StaleVersionError when the file has moved on and no snapshot of that version is left.
+    """
+    return _load(dataset_path(name), tuple(version))
+
+
+if __name__ == "__main__":
+    # python data_loader.py [dataset ...]  -> refresh Arrow snapshots
+    for dataset in sys.argv[1:] or DATASETS:
+        ingest(dataset)
+        print(f"{dataset}: {snapshot_path(dataset_path(dataset))}")
@@ -0,0 +1,122 @@
+# elasticity.py
+import argparse
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import DATA_DIR, DATASETS, LINE_TERMINATORS, VERSIONS_KEPT, factorize_keys, load_version, \
+    read_dataset, served_version
+from forecasting import REFIT_DIR
+from intensity import country_intensity, intensity_by_country
+
+PAIR_KEYS = ["Country", "Bike_Model"]
+INDEX_COLUMNS = ["Elasticity", "Comp_Intensity", "R_squared", "N_obs"]
+# Column order of Adj_Price_Elasticity.csv
+FILE_COLUMNS = PAIR_KEYS + ["Elasticity", "R_squared", "N_obs", "Comp_Intensity"]
+
+
+# Used for any (Country, Bike_Model) without an elasticity row
+_DEFAULTS = {"Elasticity": -1.0, "Comp_Intensity": 1.0, "R_squared": np.nan, "N_obs": 0}
+
+
+class ElasticityIndex(NamedTuple):
+    table: pd.DataFrame  # INDEX_COLUMNS on a sorted (Country, Bike_Model) MultiIndex
+
+
+def build_elasticity_index(elasticity_df):
+    """Index the elasticity file by (Country, Bike_Model); first row wins on duplicates."""
+    df = elasticity_df.drop_duplicates(PAIR_KEYS)
+    table = pd.DataFrame(index=pd.MultiIndex.from_frame(df[PAIR_KEYS].astype(str)))
+    for col in INDEX_COLUMNS:
+        values = df[col].to_numpy() if col in df.columns else _DEFAULTS[col]
+        table[col] = pd.Series(values, index=table.index).fillna(_DEFAULTS[col])
+    table["N_obs"] = table["N_obs"].astype(np.int64)
+    return ElasticityIndex(table.sort_index())
+
+
+def lookup_frame(index, keys):
+    """Vectorised lookup of INDEX_COLUMNS for a (Country, Bike_Model) frame, defaults filled in."""
+    found = index.table.reindex(pd.MultiIndex.from_frame(keys[PAIR_KEYS].astype(str)))
+    return found.fillna(_DEFAULTS).astype({"N_obs": np.int64}).reset_index(drop=True)
+
+
+def estimate_elasticities(history, price_col="Unit_Price", units_col="Sales_Units", comp_intensity=None):
+    """Fit log(units) ~ log(price) for every (Country, Bike_Model) series at once.
+
+    history holds one row per observation. Each series is solved in closed form
+    from grouped sums, so the cost is a few bincount passes over the rows no
+    matter how many series there are. Rows with non-positive price or units are
+    ignored; series with fewer than 3 usable rows or constant price get NaN.
+    comp_intensity (Country -> Comp_Intensity Series) is attached when given so
+    the output matches the Adj_Price_Elasticity schema.
+    """
+    df = history[(history[price_col] > 0) & (history[units_col] > 0)]
+    group, keys = factorize_keys(df, PAIR_KEYS)
+    n_groups = len(keys)
+    x = np.log(df[price_col].to_numpy(dtype=np.float64))
+    y = np.log(df[units_col].to_numpy(dtype=np.float64))
+
+    n = np.bincount(group, minlength=n_groups).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Centre on group means before forming second moments for numerical stability
+        dx = x - (np.bincount(group, weights=x, minlength=n_groups) / n)[group]
+        dy = y - (np.bincount(group, weights=y, minlength=n_groups) / n)[group]
+        sxx = np.bincount(group, weights=dx * dx, minlength=n_groups)
+        sxy = np.bincount(group, weights=dx * dy, minlength=n_groups)
+        syy = np.bincount(group, weights=dy * dy, minlength=n_groups)
+        slope = sxy / sxx
+        r_squared = np.where(syy > 0, sxy * sxy / (sxx * syy), 0.0)
+
+    usable = (n >= 3) & (sxx > 0)
+    result = keys
+    result["Elasticity"] = np.where(usable, slope, np.nan)
+    result["R_squared"] = np.where(usable, r_squared, np.nan)
+    result["N_obs"] = n.astype(np.int64)
+    if comp_intensity is not None:
+        result["Comp_Intensity"] = result["Country"].map(comp_intensity)
+    return result.sort_values(PAIR_KEYS, ignore_index=True)
+
+
+def write_elasticity_file(history, out_dir=REFIT_DIR, overwrite=False):
+    """Estimate every series in history and write them as Adj_Price_Elasticity.csv.
+
+    Comp_Intensity comes from the SWOT feed, as in the simulator. Like the
+    forecast refit, the file goes to REFIT_DIR for review unless overwrite is
+    set, which is required to replace the source file in DATA_DIR.
+    """
+    if os.path.abspath(out_dir) == os.path.abspath(DATA_DIR) and not overwrite:
+        raise ValueError(f"Refusing to overwrite the source elasticity file in {DATA_DIR}; pass overwrite=True")
+    intensity = intensity_by_country(country_intensity(read_dataset("swot")))
+    result = estimate_elasticities(history, comp_intensity=intensity)
+    result[["Elasticity", "R_squared"]] = result[["Elasticity", "R_squared"]].round(3)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, DATASETS["elasticity"])
+    # Swapped in whole, so a running watcher never reads a half-written file
+    result[FILE_COLUMNS].to_csv(path + ".tmp", index=False, lineterminator=LINE_TERMINATORS.get("elasticity", "\n"))
+    os.replace(path + ".tmp", path)
+    return result
+
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT)
+def _elasticity_index(version):
+    return build_elasticity_index(load_version("elasticity", version))
+
+
+def elasticity_index(versions=None):
+    """Elasticity index for the served elasticity file (or versions["elasticity"]), built once per version."""
+    return _elasticity_index(served_version("elasticity", versions))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate price elasticities from a price history and write "
+                                                 f"{DATASETS['elasticity']}.")
+    parser.add_argument("history_csv", help="one row per observation: Country, Bike_Model, Unit_Price, Sales_Units")
+    parser.add_argument("out_dir", nargs="?", default=REFIT_DIR)
+    parser.add_argument("--overwrite", action="store_true", help=f"replace the source file in {DATA_DIR}")
+    args = parser.parse_args()
+    out_dir = DATA_DIR if args.overwrite else args.out_dir
+    result = write_elasticity_file(pd.read_csv(args.history_csv), out_dir, overwrite=args.overwrite)
+    print(f"{len(result)} series ({result['Elasticity'].notna().sum()} estimated) written to {out_dir}")
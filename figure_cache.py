@@ -0,0 +1,76 @@
+# figure_cache.py
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+# Process-wide cap on cached figure JSON, shared by every session
+MAX_BYTES = int(os.environ.get("GTM_FIGURE_CACHE_BYTES", 64 * 1024 * 1024))
+
+
+def normalise_selection(selection):
+    """Hashable form of a filter selection.
+
+    A tuple is a group of filters and keeps its positional order; a list, set or
+    array is one multiselect and is sorted, so picking the same values in another
+    order hits the same entry. Both are normalised element by element.
+    """
+    if isinstance(selection, dict):
+        return tuple(sorted((k, normalise_selection(v)) for k, v in selection.items()))
+    if isinstance(selection, tuple):
+        return tuple(normalise_selection(v) for v in selection)
+    if isinstance(selection, (list, set, frozenset)) or getattr(selection, "ndim", 0) > 0:
+        return tuple(sorted((normalise_selection(v) for v in selection), key=repr))
+    return str(selection) if selection is not None else None
+
+
+class FigureCache:
+    """LRU cache of serialised Plotly figures bounded by total JSON size."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, chart_id, selection, version, build):
+        """Figure JSON for (chart_id, selection, version); build() -> go.Figure runs only on a miss."""
+        key = (chart_id, normalise_selection(selection), version)
+        with self._lock:
+            fig_json = self._entries.get(key)
+            if fig_json is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fig_json
+            self.misses += 1
+        fig_json = build().to_json()
+        with self._lock:
+            if key not in self._entries and len(fig_json) <= self.max_bytes:
+                self._entries[key] = fig_json
+                self._bytes += len(fig_json)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return fig_json
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+figure_cache = FigureCache()
+
+
+def plotly_chart(chart_id, selection, version, build, **kwargs):
+    """st.plotly_chart from the shared figure cache; aggregation and figure building are skipped on a hit."""
+    fig_json = figure_cache.get_or_build(chart_id, selection, version, build)
+    st.plotly_chart(json.loads(fig_json), **kwargs)
@@ -0,0 +1,200 @@
+# forecasting.py
+import argparse
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATA_DIR, DATASETS, factorize_keys, read_dataset
+from periods import month_labels, quarter_labels
+
+SERIES_KEYS = ["Country", "Bike_Model"]
+
+# Smoothing grid searched for every series at once: (alpha, beta, phi).
+# phi == 0 switches the trend off (simple exponential smoothing); phi < 1 damps it.
+ALPHAS = np.arange(0.1, 1.0, 0.1)
+TREND_SETTINGS = [(0.0, 0.0), (0.1, 0.9), (0.3, 0.9), (0.1, 1.0), (0.3, 1.0)]
+PARAM_GRID = np.array([(a, b, phi) for a in ALPHAS for b, phi in TREND_SETTINGS])
+
+CHUNK_SIZE = 50_000  # series per vectorised block, bounds memory at (grid x chunk) floats
+
+# Refit files land here unless the caller explicitly asks to overwrite the source files in DATA_DIR
+REFIT_DIR = os.path.join(DATA_DIR, "refit")
+
+
+class StackedSeries(NamedTuple):
+    keys: pd.DataFrame     # one row per series
+    periods: np.ndarray    # quarter code of each column
+    values: np.ndarray     # (series, period) units, 0 where no sales were recorded
+    start: np.ndarray      # column of each series' first observation
+
+
+class ForecastFit(NamedTuple):
+    params: np.ndarray     # (series, 3) chosen alpha, beta, phi
+    level: np.ndarray
+    trend: np.ndarray
+    mape: np.ndarray       # in-sample one-step-ahead MAPE (%)
+
+
+def stack_series(sales_df, keys=SERIES_KEYS, value_col="Sales_Units"):
+    """Pivot long sales rows into a dense (series x quarter) array."""
+    group, key_frame = factorize_keys(sales_df, keys)
+    codes = sales_df["Quarter_Period"].to_numpy()
+    first = codes.min()
+    periods = np.arange(first, codes.max() + 1)
+    shape = (len(key_frame), len(periods))
+    flat = np.ravel_multi_index((group, codes - first), shape)
+    values = np.bincount(flat, weights=sales_df[value_col].to_numpy(dtype=np.float64), minlength=shape[0] * shape[1])
+    seen = np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape) > 0
+    return StackedSeries(key_frame, periods, values.reshape(shape), seen.argmax(axis=1))
+
+
+def _fit_block(Y, start):
+    """Damped-trend exponential smoothing for every (grid point, series) pair in one recursion."""
+    alpha, beta, phi = (PARAM_GRID[:, i][:, None] for i in range(3))
+    n_series, n_periods = Y.shape
+    rows = np.arange(n_series)
+    y0 = Y[rows, start]
+    y1 = Y[rows, np.minimum(start + 1, n_periods - 1)]
+    level = np.broadcast_to(y0, (len(PARAM_GRID), n_series)).copy()
+    trend = np.where(phi > 0, np.where(start + 1 < n_periods, y1 - y0, 0.0), 0.0)
+    sse = np.zeros_like(level)
+    ape_sum = np.zeros_like(level)
+    ape_n = np.zeros(n_series)
+
+    for t in range(1, n_periods):
+        active = t > start
+        y = Y[:, t]
+        fitted = level + phi * trend
+        err = y - fitted
+        # Skip the first step after start: its trend was seeded from this very value
+        scored = active & (t > start + 1)
+        sse += err * err * scored
+        has_ape = scored & (y > 0)
+        ape_sum += np.abs(err) * (has_ape / np.where(y > 0, y, 1.0))
+        ape_n += has_ape
+        new_level = fitted + alpha * err
+        new_trend = beta * (new_level - level) + (1 - beta) * phi * trend
+        if active.all():
+            level, trend = new_level, new_trend
+        else:
+            level, trend = np.where(active, new_level, level), np.where(active, new_trend, trend)
+
+    best = sse.argmin(axis=0)
+    pick = (best, rows)
+    with np.errstate(invalid="ignore"):
+        mape = np.where(ape_n > 0, ape_sum[pick] / ape_n * 100, np.nan)
+    return ForecastFit(PARAM_GRID[best], level[pick], trend[pick], mape)
+
+
+def fit_series(stacked):
+    """Pick the best smoothing parameters per series by in-sample one-step SSE."""
+    fits = [
+        _fit_block(stacked.values[i:i + CHUNK_SIZE], stacked.start[i:i + CHUNK_SIZE])
+        for i in range(0, len(stacked.values), CHUNK_SIZE)
+    ] or [ForecastFit(np.empty((0, 3)), np.empty(0), np.empty(0), np.empty(0))]
+    return ForecastFit(*(np.concatenate(parts) for parts in zip(*fits)))
+
+
+def project(fit, horizon):
+    """(series, horizon) point forecasts; damped trend sums phi + phi^2 + ... + phi^h."""
+    phi = fit.params[:, 2][:, None]
+    steps = np.arange(1, horizon + 1)[None, :]
+    damp = np.cumsum(phi ** steps, axis=1)
+    return np.maximum(fit.level[:, None] + damp * fit.trend[:, None], 0.0)
+
+
+def forecast_quarters(sales_df, horizon=2, keys=SERIES_KEYS, actuals=None):
+    """Quarterly forecast in the bajaj_forecast_with_actuals schema.
+
+    actuals (same keys + Quarter_Period + Actual_Units) fills Actual_Units where the
+    forecast quarters have already been observed; otherwise the column is NaN.
+    """
+    stacked = stack_series(sales_df, keys)
+    fit = fit_series(stacked)
+    predicted = project(fit, horizon)
+    n_series = len(stacked.keys)
+
+    future = stacked.periods[-1] + np.arange(1, horizon + 1)
+    result = stacked.keys.iloc[np.repeat(np.arange(n_series), horizon)].reset_index(drop=True)
+    result["Quarter_Period"] = np.tile(future, n_series)
+    result["Quarter"] = quarter_labels(result["Quarter_Period"], compact=True)
+    result["Predicted_Units"] = np.rint(predicted.ravel()).astype(np.int64)
+    result["MAPE (%)"] = np.round(np.repeat(fit.mape, horizon), 2)
+    result["Actual_Units"] = np.nan
+    if actuals is not None:
+        known = actuals.assign(**{k: actuals[k].astype(str) for k in keys})
+        known = known.set_index(keys + ["Quarter_Period"])["Actual_Units"]
+        result["Actual_Units"] = known.reindex(pd.MultiIndex.from_frame(result[keys + ["Quarter_Period"]])).to_numpy()
+    return result
+
+
+def forecast_months(quarterly, unit_prices=None, keys=SERIES_KEYS):
+    """Split quarterly forecasts evenly into months, in the monthly-forecast schema.
+
+    unit_prices maps each key tuple to its Unit_Price (e.g. carried over from the
+    previous monthly file); pairs without one get the median price of their model,
+    else of their country, else of all pairs (NaN only when there are no prices).
+    """
+    monthly = quarterly.iloc[np.repeat(np.arange(len(quarterly)), 3)].reset_index(drop=True)
+    q = monthly["Quarter_Period"].to_numpy()
+    monthly["Month_Period"] = (q // 4) * 12 + (q % 4) * 3 + np.tile(np.arange(3), len(quarterly))
+    monthly["Month"] = month_labels(monthly["Month_Period"])
+    monthly["Predicted_Units"] = np.rint(monthly["Predicted_Units"] / 3).astype(np.int64)
+    if unit_prices is not None:
+        monthly["Unit_Price"] = fill_unit_prices(monthly[keys].astype(str), unit_prices)
+    else:
+        monthly["Unit_Price"] = np.nan
+    return monthly[keys + ["Month", "Predicted_Units", "MAPE (%)", "Unit_Price"]]
+
+
+def fill_unit_prices(keys_df, unit_prices):
+    """Unit_Price per row of keys_df, falling back to model, then country, then overall medians."""
+    known = unit_prices.dropna()
+    price = pd.Series(known.reindex(pd.MultiIndex.from_frame(keys_df)).to_numpy(), index=keys_df.index)
+    for level in ("Bike_Model", "Country"):
+        if level in keys_df.columns and level in known.index.names:
+            medians = known.groupby(level=level).median()
+            price = price.fillna(keys_df[level].map(medians))
+    return price.fillna(known.median()).to_numpy()
+
+
+def latest_unit_prices(monthly_forecast_df, keys=SERIES_KEYS):
+    """Last known Unit_Price per series from a monthly forecast file."""
+    ordered = monthly_forecast_df.sort_values("Month_Period")
+    return ordered.assign(**{k: ordered[k].astype(str) for k in keys}).groupby(keys)["Unit_Price"].last()
+
+
+def known_actuals(forecast_df, keys=SERIES_KEYS):
+    """Actual_Units already recorded in a quarterly forecast file, one row per series and quarter."""
+    known = forecast_df.dropna(subset=["Actual_Units"])
+    return known[keys + ["Quarter_Period", "Actual_Units"]].drop_duplicates(keys + ["Quarter_Period"], keep="last")
+
+
+def generate_forecast_files(out_dir=REFIT_DIR, horizon=2, overwrite=False):
+    """Refit every Country x Bike_Model series and write both forecast CSVs.
+
+    Actual_Units recorded in the current quarterly file are carried over. Files are
+    written to REFIT_DIR for review unless overwrite is set, which is required to
+    replace the source files in DATA_DIR.
+    """
+    if os.path.abspath(out_dir) == os.path.abspath(DATA_DIR) and not overwrite:
+        raise ValueError(f"Refusing to overwrite the source forecast files in {DATA_DIR}; pass overwrite=True")
+    sales_df = read_dataset("sales")
+    quarterly = forecast_quarters(sales_df, horizon=horizon, actuals=known_actuals(read_dataset("forecast")))
+    monthly = forecast_months(quarterly, unit_prices=latest_unit_prices(read_dataset("monthly_forecast")))
+    os.makedirs(out_dir, exist_ok=True)
+    quarterly.drop(columns="Quarter_Period").to_csv(os.path.join(out_dir, DATASETS["forecast"]), index=False)
+    monthly.to_csv(os.path.join(out_dir, DATASETS["monthly_forecast"]), index=False)
+    return quarterly, monthly
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refit the quarterly and monthly forecast files from Sales_Data.")
+    parser.add_argument("out_dir", nargs="?", default=REFIT_DIR)
+    parser.add_argument("--overwrite", action="store_true", help=f"replace the source files in {DATA_DIR}")
+    args = parser.parse_args()
+    out_dir = DATA_DIR if args.overwrite else args.out_dir
+    generate_forecast_files(out_dir, overwrite=args.overwrite)
+    print(f"forecast files written to {out_dir}")
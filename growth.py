@@ -0,0 +1,142 @@
+# growth.py
+import numpy as np
+import pandas as pd
+
+from data_loader import factorize_keys
+from periods import quarter_labels
+
+# Level name -> series keys; each level's totals come from streaming.SalesAggregates
+GROWTH_LEVELS = {
+    "Country": ["Country"],
+    "Country x Model": ["Country", "Bike_Model"],
+    "Country x Distributor": ["Country", "Distributor"],
+}
+KEY_COLUMNS = ["Country", "Bike_Model", "Distributor"]
+
+GROWTH_WINDOW = 8   # trailing quarters the statistics look at
+ZONE_TOLERANCE = 0.01  # |trend| below 1% of the average level per quarter counts as flat
+
+
+def level_totals(aggregates):
+    """Level name -> quarterly totals frame for every GROWTH_LEVELS entry."""
+    return {
+        "Country": aggregates.country_quarter,
+        "Country x Model": aggregates.country_model_quarter,
+        "Country x Distributor": aggregates.country_distributor_quarter,
+    }
+
+
+def _stack(totals_by_level, value_col):
+    """All levels' series as rows of one (series x quarter) array, NaN where a quarter has no data."""
+    codes = np.concatenate([df["Quarter_Period"].to_numpy(dtype=np.int64) for df in totals_by_level.values()])
+    periods = np.arange(codes.min(), codes.max() + 1) if len(codes) else np.empty(0, dtype=np.int64)
+    keys, groups, offset = [], [], 0
+    for level, df in totals_by_level.items():
+        group, key_frame = factorize_keys(df, GROWTH_LEVELS[level])
+        keys.append(key_frame.assign(Level=level))
+        groups.append(group + offset)
+        offset += len(key_frame)
+
+    shape = (offset, len(periods))
+    flat = np.concatenate(groups) * shape[1] + (codes - codes.min() if len(codes) else codes)
+    units = np.concatenate([df[value_col].to_numpy(dtype=np.float64) for df in totals_by_level.values()])
+    values = np.bincount(flat, weights=units, minlength=shape[0] * shape[1]).reshape(shape)
+    seen = np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape) > 0
+    key_frame = pd.concat(keys, ignore_index=True).reindex(columns=["Level"] + KEY_COLUMNS)
+    return key_frame, periods, np.where(seen, values, np.nan)
+
+
+def compound_rate(num, den, steps):
+    """Per-step compound growth (num / den) ** (1 / steps) - 1; NaN unless den > 0, num >= 0 and steps > 0."""
+    num, den, steps = np.asarray(num, dtype=np.float64), np.asarray(den, dtype=np.float64), np.asarray(steps)
+    ok = (den > 0) & (num >= 0) & (steps > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ok, (num / np.where(ok, den, 1)) ** (1 / np.where(ok, steps, 1)) - 1, np.nan)
+
+
+def step_rates(values):
+    """(series, quarter) growth of each observation over the previous one, NaN where undefined.
+
+    values has NaN for quarters without data; across such a gap the rate is the
+    compound per-quarter rate, so a missing quarter never reads as a drop to zero.
+    """
+    n_series, n_cols = values.shape
+    if n_cols == 0:
+        return values.copy()
+    col = np.arange(n_cols)
+    observed = ~np.isnan(values)
+    prev = np.maximum.accumulate(np.where(observed, col, -1), axis=1)
+    prev = np.concatenate([np.full((n_series, 1), -1), prev[:, :-1]], axis=1)
+    prev_values = np.take_along_axis(values, np.maximum(prev, 0), axis=1)
+    return np.where(observed & (prev >= 0), compound_rate(values, prev_values, col - prev), np.nan)
+
+
+def growth_statistics(totals_by_level, window=GROWTH_WINDOW, value_col="Sales_Units"):
+    """Windowed growth statistics for every series of every level in one vectorised pass.
+
+    Quarters with no rows are missing, not zero: they are skipped by the trend
+    fit, and growth across a gap is the compound per-quarter rate between the
+    observations either side. Growth from a zero quarter is undefined (NaN).
+
+    Per series: N_Quarters observed in the window, Last_Quarter / Last_Units,
+    QoQ_Latest and QoQ_Avg (per-quarter rates), YoY (last observed quarter vs
+    four quarters earlier), CAGR (annualised, first to last observation in the
+    window), Slope (units per quarter, least squares) and Slope_Pct (Slope over
+    the window mean), plus a Zone and a Rank within the level by Slope_Pct.
+    """
+    key_frame, periods, full = _stack(totals_by_level, value_col)
+    values = full[:, -window:] if window else full
+    n_series, n_cols = values.shape
+    col = np.arange(n_cols)
+    rows = np.arange(n_series)
+    observed = ~np.isnan(values)
+    n_obs = observed.sum(axis=1)
+    has_obs = n_obs > 0
+
+    first = observed.argmax(axis=1)
+    last = n_cols - 1 - observed[:, ::-1].argmax(axis=1) if n_cols else np.zeros(n_series, dtype=np.int64)
+    last_units = np.where(has_obs, values[rows, last] if n_cols else np.nan, np.nan)
+
+    # Rate between each observation and the previous one in the window
+    step_rate = step_rates(values)
+    rated = ~np.isnan(step_rate)
+    qoq_avg = np.where(rated.any(axis=1), np.where(rated, step_rate, 0).sum(axis=1) / np.maximum(rated.sum(axis=1), 1), np.nan)
+    qoq_latest = step_rate[rows, last] if n_cols else np.full(n_series, np.nan)
+
+    # YoY looks back four quarters on the full history, not just the window
+    last_full = last + (full.shape[1] - n_cols)
+    base = last_full - 4
+    yoy_base = np.where(base >= 0, full[rows, np.maximum(base, 0)], np.nan) if full.shape[1] else np.full(n_series, np.nan)
+    yoy = np.where(has_obs, compound_rate(last_units, yoy_base, np.ones(n_series)), np.nan)
+
+    first_units = values[rows, first] if n_cols else np.full(n_series, np.nan)
+    cagr = np.where(last > first, compound_rate(last_units, first_units, (last - first) / 4), np.nan)
+
+    # Least-squares trend over the observed quarters only
+    x = np.where(observed, col, 0.0)
+    y = np.where(observed, values, 0.0)
+    sx, sy = x.sum(axis=1), y.sum(axis=1)
+    sxx, sxy = (x * x).sum(axis=1), (x * y).sum(axis=1)
+    denom = n_obs * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where((n_obs >= 2) & (denom > 0), (n_obs * sxy - sx * sy) / denom, np.nan)
+        mean = np.where(has_obs, sy / n_obs, np.nan)
+        slope_pct = np.where(mean > 0, slope / mean, np.nan)
+
+    result = key_frame
+    result["N_Quarters"] = n_obs
+    result["Last_Quarter"] = np.where(has_obs, quarter_labels(periods[-n_cols:][last] if n_cols else last), None)
+    result["Last_Units"] = last_units
+    result["QoQ_Latest"] = qoq_latest
+    result["QoQ_Avg"] = qoq_avg
+    result["YoY"] = yoy
+    result["CAGR"] = cagr
+    result["Slope"] = slope
+    result["Slope_Pct"] = slope_pct
+    result["Zone"] = np.select(
+        [np.isnan(slope_pct), slope_pct > ZONE_TOLERANCE, slope_pct < -ZONE_TOLERANCE],
+        ["Insufficient data", "Growth", "Decline"],
+        "Flat",
+    )
+    result["Rank"] = result.groupby("Level", sort=False)["Slope_Pct"].rank(ascending=False, method="first")
+    return result.sort_values(["Level", "Rank"], ignore_index=True, na_position="last")
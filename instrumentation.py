@@ -0,0 +1,153 @@
+# instrumentation.py
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import startup
+
+# Opt-in: tracing every allocation slows the app, so it stays off unless GTM_INSTRUMENT is set
+ENABLED = os.environ.get("GTM_INSTRUMENT", "") not in ("", "0")
+# One JSON line per measured stage, for shipping to the log pipeline
+INSTRUMENT_LOG = os.environ.get("GTM_INSTRUMENT_LOG", "instrumentation.jsonl")
+
+_local = threading.local()   # open stages of the current script thread
+_log_lock = threading.Lock()
+
+
+def frame_bytes(obj):
+    """Memory held by the DataFrames / arrays in a stage result (NamedTuples and tuples are walked)."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (tuple, list)):
+        return sum(frame_bytes(item) for item in obj)
+    return 0
+
+
+def _session_id():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
+
+
+def _records():
+    """Latest record per stage for this session (module-level outside Streamlit)."""
+    if _session_id() is None:
+        return _local.__dict__.setdefault("records", {})
+    return st.session_state.setdefault("_instrumentation", {})
+
+
+def _log(record):
+    try:
+        with _log_lock, open(INSTRUMENT_LOG, "a") as fh:
+            fh.write(json.dumps(record) + "\n")
+    except OSError:
+        pass  # Read-only filesystem: the panel still shows the numbers
+
+
+@contextmanager
+def stage(name):
+    """Time a named stage and its peak traced allocation; yields the record (None when disabled).
+
+    Peaks come from tracemalloc, which is process-wide, so with several
+    sessions rendering at once a stage's peak can include their allocations.
+    """
+    if not ENABLED:
+        yield None
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    stack = _local.__dict__.setdefault("stack", [])
+    current, outer_peak = tracemalloc.get_traced_memory()
+    # reset_peak() below would hide the enclosing stage's peak so far; carry it on the stack
+    if stack:
+        stack[-1]["max_seen"] = max(stack[-1]["max_seen"], outer_peak)
+    tracemalloc.reset_peak()
+    frame = {"max_seen": 0}
+    stack.append(frame)
+    record = {"stage": name, "session": _session_id(), "release": startup.RELEASE,
+              "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = max(tracemalloc.get_traced_memory()[1], frame["max_seen"])
+        stack.pop()
+        if stack:
+            stack[-1]["max_seen"] = max(stack[-1]["max_seen"], peak)
+        record["ms"] = round(elapsed * 1000, 2)
+        record["peak_bytes"] = max(peak - current, 0)
+        _records()[name] = record
+        _log(record)
+
+
+def measure(name, fn, *args, **kwargs):
+    """Call fn inside stage(name), also recording the size of the frames it returns."""
+    if not ENABLED:
+        return fn(*args, **kwargs)
+    with stage(name) as record:
+        result = fn(*args, **kwargs)
+        record["frame_bytes"] = frame_bytes(result)
+    return result
+
+
+def render_panel(data_status=None):
+    """Admin expander with the latest timing and memory of every stage this session ran.
+
+    data_status is a data watcher's status method; the panel then also lists
+    the dataset versions being served, any newer version whose rebuild failed
+    (so an older one is still served) and the last rebuild.
+    """
+    if not ENABLED:
+        return
+    with st.expander("🛠️ Admin: stage timings, memory & data versions"):
+        if data_status is not None:
+            _render_data_status(data_status())
+        records = list(_records().values())
+        if not records:
+            st.info("No stages measured yet in this session.")
+            return
+        table = pd.DataFrame(records)
+        if "frame_bytes" not in table.columns:
+            table["frame_bytes"] = np.nan
+        table["Peak MB"] = table["peak_bytes"] / 2 ** 20
+        table["Frames MB"] = table["frame_bytes"] / 2 ** 20
+        st.dataframe(
+            table[["stage", "ms", "Peak MB", "Frames MB", "timestamp"]]
+            .rename(columns={"stage": "Stage", "ms": "Time (ms)", "timestamp": "Measured at"})
+            .sort_values("Time (ms)", ascending=False),
+            hide_index=True,
+        )
+        st.caption(f"Startup phases (s): {startup.report()} · structured log: {INSTRUMENT_LOG}")
+
+
+def _render_data_status(status):
+    failed = status["failed"]
+    if failed:
+        st.warning("Rebuild failed, still serving the previous version of: " + ", ".join(sorted(failed)))
+    st.dataframe(
+        pd.DataFrame({
+            "Dataset": list(status["served"]),
+            "Served": list(status["served"].values()),
+            "Failed rebuild": [failed.get(name, "") for name in status["served"]],
+        }),
+        hide_index=True,
+    )
+    rebuild = status["last_rebuild"]
+    if rebuild:
+        st.caption(f"Last rebuild {rebuild['at']}: {', '.join(rebuild['datasets'])} "
+                   f"({len(rebuild['artifacts'])} artifacts, {rebuild['seconds']} s)")
+    if status["last_error"]:
+        st.code(status["last_error"]["error"])
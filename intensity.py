@@ -0,0 +1,123 @@
+# intensity.py
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import VERSIONS_KEPT, load_version, served_version
+
+# Default factor weights. The factors and their Low/Medium/High levels follow assets/Factors1.png, which gives
+# no weights; these are this engine's choice (market share counts most) and weights= takes others.
+# A competitor's index is the weighted sum of its factor scores, in [0, 1]
+INTENSITY_WEIGHTS = {
+    "Market_Share": 0.40,
+    "Ad_Spend_Level": 0.15,
+    "Dealer_Density": 0.15,
+    "Promo_Aggressiveness": 0.15,
+    "Price_differential": 0.15,
+}
+FACTORS = [f for f in INTENSITY_WEIGHTS if f != "Market_Share"]
+LEVEL_SCORES = {"low": 0.0, "medium": 0.5, "high": 1.0}
+TOP_N = 3
+# Our own brand appears in the SWOT feed but is not a competitor
+OWN_BRAND = "Bajaj Auto"
+
+# Without explicit factor columns, a SWOT strength raises its factor to High and a weakness drops it to Low
+STRENGTH_FACTORS = {
+    "Affordable pricing": "Price_differential",
+    "Strong brand": "Ad_Spend_Level",
+    "Wide dealer network": "Dealer_Density",
+}
+WEAKNESS_FACTORS = {
+    "Weak brand presence": "Ad_Spend_Level",
+    "Limited service centers": "Dealer_Density",
+}
+
+KEYS = ["Country", "Competitor"]
+
+
+def factor_scores(swot_df):
+    """(row, FACTORS) scores in [0, 1]: Low/Medium/High columns when the feed has them, else read off the SWOT text."""
+    scores = np.full((len(swot_df), len(FACTORS)), LEVEL_SCORES["medium"])
+    for j, factor in enumerate(FACTORS):
+        if factor in swot_df.columns:
+            level = swot_df[factor].astype(str).str.strip().str.lower().map(LEVEL_SCORES)
+            scores[:, j] = level.fillna(LEVEL_SCORES["medium"]).to_numpy()
+            continue
+        if "Strength" in swot_df.columns:
+            strong = [s for s, f in STRENGTH_FACTORS.items() if f == factor]
+            scores[swot_df["Strength"].isin(strong).to_numpy(), j] = LEVEL_SCORES["high"]
+        if "Weakness" in swot_df.columns:
+            weak = [w for w, f in WEAKNESS_FACTORS.items() if f == factor]
+            scores[swot_df["Weakness"].isin(weak).to_numpy(), j] = LEVEL_SCORES["low"]
+    return scores
+
+
+def competitor_intensity(swot_df, weights=INTENSITY_WEIGHTS):
+    """Intensity index per (Country, Competitor).
+
+    Rows of the same competitor are combined (market share summed, factor
+    scores averaged). Market share is scaled by the country's largest share so
+    the leader scores 1, then combined with the factors using weights.
+    """
+    scores = pd.DataFrame(factor_scores(swot_df), columns=FACTORS, index=swot_df.index)
+    rows = pd.concat([swot_df[KEYS + ["Market_Share_%"]], scores], axis=1)
+    grouped = rows.groupby(KEYS, observed=True, sort=False)
+    result = pd.concat([grouped["Market_Share_%"].sum(), grouped[FACTORS].mean()], axis=1).reset_index()
+
+    leader = result.groupby("Country", observed=True)["Market_Share_%"].transform("max")
+    share = np.where(leader > 0, result["Market_Share_%"] / leader.where(leader > 0, 1), 0.0)
+    w = np.array([weights[f] for f in INTENSITY_WEIGHTS], dtype=np.float64)
+    components = np.column_stack([share, result[FACTORS].to_numpy()])
+    result["Intensity"] = components @ (w / w.sum())
+    return result
+
+
+def country_intensity(swot_df, top_n=TOP_N, weights=INTENSITY_WEIGHTS, exclude=(OWN_BRAND,)):
+    """Comp_Intensity per country: mean intensity of its top_n competitors.
+
+    Rows of the brands in exclude are dropped before anything is scaled or
+    ranked. Competitors are ordered within each country in one lexsort; the
+    top_n are the first positions of each country's run, so no per-country
+    loop is needed.
+
+    This replaces the static Comp_Intensity column of Adj_Price_Elasticity.csv,
+    whose method is not recorded and which this does not reproduce country by
+    country. On the shipped SWOT feed the mean level agrees (0.618 vs 0.613),
+    but e.g. Egypt comes out 0.618 against the file's 0.448.
+    """
+    if exclude:
+        swot_df = swot_df[~swot_df["Competitor"].isin(list(exclude))]
+    competitors = competitor_intensity(swot_df, weights)
+    country = competitors["Country"].astype(str).to_numpy()
+    intensity = competitors["Intensity"].to_numpy()
+    order = np.lexsort((-intensity, country))
+    country, intensity = country[order], intensity[order]
+    starts = np.flatnonzero(np.r_[True, country[1:] != country[:-1]])
+    position = np.arange(len(country)) - np.repeat(starts, np.diff(np.r_[starts, len(country)]))
+    top = position < top_n
+
+    top_frame = pd.DataFrame({
+        "Country": country[top],
+        "Intensity": intensity[top],
+        "Competitor": competitors["Competitor"].astype(str).to_numpy()[order][top],
+    })
+    by_country = top_frame.groupby("Country", sort=True)
+    return pd.DataFrame({
+        "Comp_Intensity": by_country["Intensity"].mean().round(3),
+        "Top_Competitors": by_country["Competitor"].agg(", ".join),
+    }).reset_index()
+
+
+def intensity_by_country(table):
+    """Country -> Comp_Intensity Series, the form build_forecast_book takes."""
+    return table.set_index("Country")["Comp_Intensity"]
+
+
+@st.cache_data(show_spinner=False, max_entries=VERSIONS_KEPT)
+def _country_intensity(version):
+    return country_intensity(load_version("swot", version))
+
+
+def competitive_intensity(versions=None):
+    """Country intensity for the served Competitor_SWOT_Data (or versions["swot"]), recomputed once per version."""
+    return _country_intensity(served_version("swot", versions))
@@ -0,0 +1,65 @@
+# periods.py
+import numpy as np
+import pandas as pd
+
+# Integer period codes: quarters are year * 4 + (quarter - 1), months are year * 12 + (month - 1).
+# Consecutive periods differ by exactly 1, so sorting, "next N periods" and joins are integer ops.
+
+_QUARTER_RE = r"^\s*(?:Q(?P<q1>[1-4])-(?P<y1>\d{4})|(?P<y2>\d{4})\s*Q(?P<q2>[1-4]))\s*$"
+
+
+def _parse_labels(values, parse_unique, kind):
+    """Parse each distinct label once and broadcast the codes back to every row."""
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    if (codes < 0).any():
+        raise ValueError(f"Missing {kind} label")
+    parsed = parse_unique(pd.Series(uniques, dtype=object).astype(str))
+    bad = parsed.isna()
+    if bad.any():
+        raise ValueError(f"Unrecognised {kind} label(s): {list(parsed.index[bad].map(str))}")
+    return parsed.to_numpy(dtype=np.int32)[codes]
+
+
+def _parse_quarter_uniques(labels):
+    parts = labels.str.extract(_QUARTER_RE)
+    year = pd.to_numeric(parts["y1"]).fillna(pd.to_numeric(parts["y2"]))
+    quarter = pd.to_numeric(parts["q1"]).fillna(pd.to_numeric(parts["q2"]))
+    return pd.Series((year * 4 + quarter - 1).to_numpy(), index=labels.to_numpy())
+
+
+def _parse_month_uniques(labels):
+    dates = pd.to_datetime(labels, format="%b-%y", errors="coerce")
+    return pd.Series((dates.dt.year * 12 + dates.dt.month - 1).to_numpy(), index=labels.to_numpy())
+
+
+def parse_quarters(values):
+    """Map "Q1-2025" / "2025Q1" labels to integer quarter codes."""
+    return _parse_labels(values, _parse_quarter_uniques, "quarter")
+
+
+def parse_months(values):
+    """Map "Jul-25" labels to integer month codes."""
+    return _parse_labels(values, _parse_month_uniques, "month")
+
+
+def quarter_labels(codes, compact=False):
+    """Canonical "Q1-2025" labels for quarter codes ("2025Q1" when compact, as in the forecast files)."""
+    codes = np.asarray(codes)
+    if compact:
+        return [f"{y}Q{q + 1}" for y, q in zip(codes // 4, codes % 4)]
+    return [f"Q{q + 1}-{y}" for y, q in zip(codes // 4, codes % 4)]
+
+
+def month_labels(codes):
+    """Canonical "Jul-25" labels for month codes."""
+    codes = np.asarray(codes)
+    return pd.to_datetime({"year": codes // 12, "month": codes % 12 + 1, "day": 1}).dt.strftime("%b-%y").tolist()
+
+
+def add_period_columns(df):
+    """Attach Quarter_Period / Month_Period codes for whichever period columns df has."""
+    if "Quarter" in df.columns:
+        df["Quarter_Period"] = parse_quarters(df["Quarter"])
+    if "Month" in df.columns:
+        df["Month_Period"] = parse_months(df["Month"])
+    return df
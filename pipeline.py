@@ -0,0 +1,330 @@
+# pipeline.py
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import streamlit as st
+
+from clustering import distributor_segments, segment_distributors
+from data_loader import DATA_DIR, DATASETS, VERSIONS_KEPT, current_version, load_version, read_dataset, served_version
+from elasticity import PAIR_KEYS, build_elasticity_index, elasticity_index
+from growth import growth_statistics, level_totals, step_rates
+from intensity import competitive_intensity, country_intensity, intensity_by_country
+from scenarios import build_forecast_book, forecast_book, price_grid, scenario_totals
+from streaming import aggregate_sales, sales_aggregates, summarise_sales
+from uncertainty import simulate_scenarios
+
+OUTPUT_DIR = os.path.join(DATA_DIR, "outputs")
+MANIFEST = "manifest.json"
+# Bump when an output's definition changes so files written by older code are recomputed
+OUTPUT_REVISION = 4
+
+SIMULATOR_PRICE_CHANGES = np.round(np.arange(-0.20, 0.201, 0.05), 2)
+# Draws per grid point for the precomputed bands; the interactive simulator uses uncertainty.N_SAMPLES
+GRID_SAMPLES = 5_000
+
+
+# Output name -> datasets it is computed from
+OUTPUT_INPUTS = {
+    "forecast_summary": ("forecast", "sales"),
+    "forecast_accuracy": ("forecast",),
+    "growth_rates": ("sales",),
+    "growth_state": ("sales",),
+    "growth_zones": ("sales",),
+    "segment_summary": ("distributor", "clusters"),
+    "market_share": ("swot",),
+    "elasticity_table": ("elasticity",),
+    "country_intensity": ("swot",),
+    "simulator_grid": ("monthly_forecast", "elasticity", "swot"),
+}
+
+
+# --- Tab 1 ---
+def next_quarter_forecast(forecast_df, sales_df, n_quarters=2):
+    """Forecast units per Country, Quarter and model for the first quarters not yet in the actuals."""
+    future_quarters = np.setdiff1d(forecast_df["Quarter_Period"].unique(), sales_df["Quarter_Period"].unique())
+    next_forecast = forecast_df[forecast_df["Quarter_Period"].isin(future_quarters[:n_quarters])]
+    return (
+        next_forecast
+        .groupby(["Country", "Quarter", "Bike_Model"], observed=True)["Predicted_Units"]
+        .sum()
+        .reset_index()
+        .rename(columns={"Predicted_Units": "Forecast_Units"})
+        .sort_values("Forecast_Units", ascending=False)
+    )
+
+
+def growth_rates(sales_totals):
+    """Average quarter-on-quarter growth of actual sales per country over the whole history.
+
+    This is growth_statistics' QoQ_Avg: quarters without sales are gaps, not
+    zeros, and growth from a zero quarter is undefined rather than infinite.
+    sales_totals may be raw Sales_Data rows or Country x Quarter totals.
+    """
+    stats = growth_statistics({"Country": sales_totals}, window=None)
+    result = stats[["Country", "QoQ_Avg"]].rename(columns={"QoQ_Avg": "Avg Growth Rate"})
+    return result.sort_values("Avg Growth Rate", ascending=False, ignore_index=True)
+
+
+def growth_state(country_totals):
+    """Running growth state per country from Country x Quarter totals (Country, Quarter_Period, Sales_Units).
+
+    Last_Period / Last_Units are the latest quarter with sales; Growth_Sum and
+    Growth_N add up the quarter-on-quarter rates (growth.step_rates), so
+    Growth_Sum / Growth_N is growth_rates' Avg Growth Rate and a new quarter
+    updates it without the history (see actuals.ActualsBook).
+    """
+    totals = (country_totals.assign(Country=country_totals["Country"].astype(str))
+              .pivot_table(index="Country", columns="Quarter_Period", values="Sales_Units", aggfunc="sum"))
+    if len(totals.columns):
+        totals = totals.reindex(columns=range(int(totals.columns.min()), int(totals.columns.max()) + 1))
+    units = totals.to_numpy(dtype=np.float64)
+    rates = step_rates(units)
+    observed = ~np.isnan(units)
+    last = units.shape[1] - 1 - observed[:, ::-1].argmax(axis=1) if units.shape[1] else np.zeros(len(units), dtype=int)
+    rows = np.arange(len(units))
+    return pd.DataFrame({
+        "Country": totals.index.to_numpy(dtype=object),
+        "Last_Period": totals.columns.to_numpy()[last] if units.shape[1] else np.zeros(0, dtype=np.int64),
+        "Last_Units": units[rows, last] if units.shape[1] else np.zeros(0),
+        "Growth_Sum": np.nansum(rates, axis=1),
+        "Growth_N": (~np.isnan(rates)).sum(axis=1),
+    })
+
+
+def forecast_errors(forecast_df):
+    """Per-pair sum (APE_Sum) and count (N_Actuals) of absolute percentage errors over rows with recorded actuals."""
+    scored = forecast_df[forecast_df["Actual_Units"].fillna(0) > 0]
+    actual = scored["Actual_Units"].to_numpy(dtype=np.float64)
+    ape = np.abs(actual - scored["Predicted_Units"].to_numpy(dtype=np.float64)) / actual
+    keys = [scored[k].astype(str).to_numpy() for k in PAIR_KEYS]
+    return pd.DataFrame({"APE_Sum": ape, "N_Actuals": 1}, index=pd.MultiIndex.from_arrays(keys, names=PAIR_KEYS)) \
+        .groupby(level=PAIR_KEYS).sum()
+
+
+def forecast_accuracy(errors):
+    """Forecast-vs-actual MAPE (%) per pair from forecast_errors totals."""
+    result = errors.reset_index()
+    result["MAPE (%)"] = np.round(result["APE_Sum"] / result["N_Actuals"] * 100, 2)
+    return result[PAIR_KEYS + ["N_Actuals", "MAPE (%)"]]
+
+
+# --- Tab 2 ---
+def segment_summary(segments):
+    summary = segments["Cluster_Labels"].value_counts().reset_index()
+    summary.columns = ["Cluster_Labels", "Count"]
+    return summary
+
+
+# --- Tab 3 ---
+def competitor_market_share(swot_df):
+    return swot_df.groupby("Competitor", observed=True)["Market_Share_%"].sum().reset_index()
+
+
+# --- Tab 4 ---
+def simulator_grid(book, price_changes=SIMULATOR_PRICE_CHANGES, n_samples=GRID_SAMPLES):
+    """Horizon totals of adjusted units and revenue, with P10/P50/P90 bands, for every pair at each price change."""
+    return scenario_totals(simulate_scenarios(book, price_grid(book, price_changes), n_samples))
+
+
+# --- Output builders ---
+# Intermediates shared by several outputs, built from a context (see OutputContext)
+DERIVED = {
+    "sales_aggregates": lambda ctx: summarise_sales([ctx["sales"]]),
+    "segments": lambda ctx: segment_distributors(ctx["distributor"], previous=ctx["clusters"]),
+    "elasticity_index": lambda ctx: build_elasticity_index(ctx["elasticity"]),
+    "intensity": lambda ctx: country_intensity(ctx["swot"]),
+    "forecast_book": lambda ctx: build_forecast_book(ctx["monthly_forecast"], ctx["elasticity_index"],
+                                                     intensity_by_country(ctx["intensity"])),
+}
+
+# Output name -> builder(ctx); each reads only the datasets listed for it in OUTPUT_INPUTS
+OUTPUT_BUILDERS = {
+    "forecast_summary": lambda ctx: next_quarter_forecast(ctx["forecast"], ctx["sales_aggregates"].country_quarter),
+    "forecast_accuracy": lambda ctx: forecast_accuracy(forecast_errors(ctx["forecast"])),
+    "growth_rates": lambda ctx: growth_rates(ctx["sales_aggregates"].country_quarter),
+    "growth_state": lambda ctx: growth_state(ctx["sales_aggregates"].country_quarter),
+    "growth_zones": lambda ctx: growth_statistics(level_totals(ctx["sales_aggregates"])),
+    "segment_summary": lambda ctx: segment_summary(ctx["segments"]),
+    "market_share": lambda ctx: competitor_market_share(ctx["swot"]),
+    "elasticity_table": lambda ctx: ctx["elasticity_index"].table[["Elasticity"]].reset_index(),
+    "country_intensity": lambda ctx: ctx["intensity"],
+    "simulator_grid": lambda ctx: simulator_grid(ctx["forecast_book"]),
+}
+
+# Outputs only the batch job writes (run(backtest=True)) -> datasets they are computed from
+BATCH_OUTPUT_INPUTS = {
+    "backtest_series_mape": ("sales",),
+    "backtest_step_mape": ("sales",),
+}
+
+
+class OutputContext:
+    """Datasets and DERIVED intermediates by name, each built on first use and then reused.
+
+    load(name) supplies a dataset; derived replaces some DERIVED builders
+    (e.g. with the app's version-keyed caches).
+    """
+
+    def __init__(self, load, derived=None):
+        self._load = load
+        self._builders = {**DERIVED, **(derived or {})}
+        self._values = {}
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            build = self._builders.get(name)
+            self._values[name] = build(self) if build else self._load(name)
+        return self._values[name]
+
+
+def compute_outputs(datasets, sales=None, names=None):
+    """Run the tab computations for names (default: all) on already-loaded datasets; returns name -> DataFrame.
+
+    sales (SalesAggregates, e.g. streamed by aggregate_sales) stands in for the
+    raw sales table, which is then not needed at all. Only the datasets and
+    intermediates the requested outputs use are touched.
+    """
+    derived = {"sales_aggregates": lambda ctx: sales} if sales is not None else None
+    ctx = OutputContext(datasets.__getitem__, derived)
+    return {name: OUTPUT_BUILDERS[name](ctx) for name in names or OUTPUT_BUILDERS}
+
+
+# --- Materialised outputs ---
+def input_versions():
+    """Content digest of every input file on disk; outputs are valid only for these."""
+    return {name: current_version(name)[3] for name in DATASETS}
+
+
+def output_version(name, versions=None):
+    """Digests of just the datasets an output depends on, for keying caches built from it.
+
+    These are the served versions unless versions (name -> fingerprint) overrides some.
+    """
+    return tuple(served_version(dataset, versions)[3] for dataset in OUTPUT_INPUTS[name])
+
+
+# Serialises manifest read-modify-write between sessions filling in outputs
+_manifest_lock = threading.Lock()
+
+
+def _read_manifest(out_dir):
+    """Output name -> digests of the inputs it was computed from, for outputs written by this revision."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("outputs", {}) if manifest.get("revision") == OUTPUT_REVISION else {}
+
+
+def _write_manifest(entries, out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + ".tmp", "w") as fh:
+        json.dump({"revision": OUTPUT_REVISION, "outputs": entries}, fh, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def write_outputs(outputs, versions, out_dir=OUTPUT_DIR):
+    """Write outputs and record, per output, the digests of the inputs it depends on (versions: name -> digest).
+
+    Entries for outputs not written here are kept, so outputs can be filled in one at a time.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    inputs = {**OUTPUT_INPUTS, **BATCH_OUTPUT_INPUTS}
+    with _manifest_lock:
+        entries = _read_manifest(out_dir)
+        # Unlist the outputs first, so a crash mid-write leaves them missing rather than wrongly valid
+        if any(name in entries for name in outputs):
+            _write_manifest({k: v for k, v in entries.items() if k not in outputs}, out_dir)
+        for name, df in outputs.items():
+            path = os.path.join(out_dir, name + ".arrow")
+            feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), path + ".tmp",
+                                  compression="uncompressed")
+            os.replace(path + ".tmp", path)
+            entries[name] = {dataset: versions[dataset] for dataset in inputs.get(name, versions)}
+        _write_manifest(entries, out_dir)
+
+
+def read_output(name, versions, out_dir=OUTPUT_DIR):
+    """A single materialised output, or None when missing or stale for these input versions (name -> digest)."""
+    recorded = _read_manifest(out_dir).get(name)
+    if not recorded or any(recorded.get(dataset) != digest for dataset, digest in versions.items()):
+        return None
+    try:
+        return feather.read_table(os.path.join(out_dir, name + ".arrow"), memory_map=True).to_pandas()
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+
+def run(out_dir=OUTPUT_DIR, refit_forecasts=False, backtest=False, overwrite_forecasts=False):
+    """Whole GTM pipeline end to end, outside Streamlit.
+
+    refit_forecasts writes refit forecast files to forecasting.REFIT_DIR for review;
+    with overwrite_forecasts they replace the source files and feed this run.
+    """
+    if refit_forecasts:
+        from forecasting import REFIT_DIR, generate_forecast_files
+        generate_forecast_files(DATA_DIR if overwrite_forecasts else REFIT_DIR, overwrite=overwrite_forecasts)
+    # Sales_Data is streamed into aggregates rather than loaded whole
+    datasets = {name: read_dataset(name) for name in DATASETS if name != "sales"}
+    outputs = compute_outputs(datasets, aggregate_sales())
+    if backtest:
+        from backtesting import aggregate_mape, backtest as run_backtest
+        per_origin, per_series = run_backtest(read_dataset("sales"))
+        outputs["backtest_series_mape"] = per_series
+        outputs["backtest_step_mape"] = aggregate_mape(per_origin)
+    write_outputs(outputs, input_versions(), out_dir)
+    return outputs
+
+
+def _cached_derived(versions):
+    """DERIVED builders backed by the app's version-keyed caches (shared with the watcher)."""
+    return {
+        "sales_aggregates": lambda ctx: sales_aggregates(versions),
+        "segments": lambda ctx: distributor_segments(versions),
+        "elasticity_index": lambda ctx: elasticity_index(versions),
+        "intensity": lambda ctx: competitive_intensity(versions),
+        "forecast_book": lambda ctx: forecast_book(versions),
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=VERSIONS_KEPT * len(OUTPUT_INPUTS))
+def _output(name, inputs_key):
+    versions = dict(inputs_key)
+    digests = {dataset: version[3] for dataset, version in versions.items()}
+    df = read_output(name, digests)
+    if df is None:
+        # Not materialised for these inputs yet: build just this output and record it for other processes
+        load = lambda dataset: load_version(dataset, versions[dataset])
+        df = OUTPUT_BUILDERS[name](OutputContext(load, _cached_derived(versions)))
+        try:
+            write_outputs({name: df}, digests)
+        except OSError:
+            pass  # Read-only data dir: keep serving the in-process result
+    return df
+
+
+def output(name, versions=None):
+    """One pipeline output, loaded on first access (only its own file is read, or only it is computed).
+
+    Keyed on its own inputs only, so refreshing an unrelated dataset leaves it cached.
+    """
+    return _output(name, tuple((dataset, served_version(dataset, versions)) for dataset in OUTPUT_INPUTS[name]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the GTM hub computations and write their outputs.")
+    parser.add_argument("--out-dir", default=OUTPUT_DIR)
+    parser.add_argument("--refit-forecasts", action="store_true", help="refit the forecast CSVs from Sales_Data into data/refit")
+    parser.add_argument("--overwrite-forecasts", action="store_true",
+                        help="with --refit-forecasts, replace the source forecast files used by this run")
+    parser.add_argument("--backtest", action="store_true", help="also write rolling-origin MAPE tables")
+    args = parser.parse_args()
+    for name, df in run(args.out_dir, args.refit_forecasts, args.backtest, args.overwrite_forecasts).items():
+        print(f"{name}: {len(df)} rows")
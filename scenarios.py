@@ -0,0 +1,135 @@
+# scenarios.py
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import VERSIONS_KEPT, load_version, served_version
+from elasticity import PAIR_KEYS, build_elasticity_index, lookup_frame
+from intensity import competitive_intensity, intensity_by_country
+
+
+# Percentile columns added by uncertainty.simulate_scenarios; they sum over months like the point values
+BAND_COLUMNS = [f"{measure}_P{p}" for measure in ("Adjusted", "Revenue") for p in (10, 50, 90)]
+
+
+class ForecastBook(NamedTuple):
+    params: pd.DataFrame       # one row per (Country, Bike_Model): Base_Price, elasticity index columns, Effective_Elasticity
+    pair_index: pd.MultiIndex  # (Country, Bike_Model) -> position in params
+    forecast: pd.DataFrame     # monthly forecast rows, grouped contiguously by pair
+    starts: np.ndarray         # first forecast row of each pair
+    counts: np.ndarray         # number of forecast rows of each pair
+
+
+def pair_parameters(forecast_df, index, intensity=None):
+    """Base price and effective elasticity for every (Country, Bike_Model) in the forecast.
+
+    intensity (Country -> Comp_Intensity, e.g. computed from the SWOT feed) overrides
+    the elasticity file's static column for the countries it covers.
+    """
+    params = (
+        forecast_df
+        .groupby(PAIR_KEYS, observed=True)["Unit_Price"]
+        .mean()
+        .rename("Base_Price")
+        .reset_index()
+    )
+    params = pd.concat([params, lookup_frame(index, params)], axis=1)
+    if intensity is not None:
+        params["Comp_Intensity"] = params["Country"].astype(str).map(intensity).fillna(params["Comp_Intensity"])
+    params["Effective_Elasticity"] = params["Elasticity"] * params["Comp_Intensity"]
+    return params
+
+
+def build_forecast_book(forecast_df, index, intensity=None):
+    """Group the monthly forecast by pair once so scenarios can gather rows by offset."""
+    params = pair_parameters(forecast_df, index, intensity)
+    pair_index = pd.MultiIndex.from_frame(params[PAIR_KEYS])
+    row_pair = pair_index.get_indexer(pd.MultiIndex.from_frame(forecast_df[PAIR_KEYS]))
+    order = np.argsort(row_pair, kind="stable")
+    counts = np.bincount(row_pair, minlength=len(params))
+    forecast = forecast_df.iloc[order].reset_index(drop=True)
+    return ForecastBook(params, pair_index, forecast, np.cumsum(counts) - counts, counts)
+
+
+def expand_scenarios(book, scenarios):
+    """Scenario inputs resolved against the book, plus the forecast rows of each scenario.
+
+    Returns (scenarios, pair, price_change_pct, new_price, rows, scenario_of_row):
+    scenarios without a forecast are dropped; rows index book.forecast.
+    """
+    scenarios = scenarios.reset_index(drop=True)
+    if "Scenario" not in scenarios.columns:
+        scenarios = scenarios.assign(Scenario=scenarios.index)
+    pair = book.pair_index.get_indexer(pd.MultiIndex.from_frame(scenarios[PAIR_KEYS]))
+    scenarios = scenarios[pair >= 0]
+    pair = pair[pair >= 0]
+
+    base_price = book.params["Base_Price"].to_numpy()[pair]
+    if "New_Price" in scenarios.columns:
+        new_price = scenarios["New_Price"].to_numpy(dtype=np.float64)
+        price_change_pct = (new_price - base_price) / base_price
+    else:
+        price_change_pct = scenarios["Price_Change_Pct"].to_numpy(dtype=np.float64)
+        new_price = base_price * (1 + price_change_pct)
+
+    # Expand every scenario to the forecast rows of its pair
+    n = book.counts[pair]
+    scenario_of_row = np.repeat(np.arange(len(pair)), n)
+    rows = np.repeat(book.starts[pair], n) + np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    return scenarios, pair, price_change_pct, new_price, rows, scenario_of_row
+
+
+def evaluate_scenarios(book, scenarios, expanded=None):
+    """Evaluate a scenario table in one vectorised pass.
+
+    scenarios has Country, Bike_Model and either New_Price or Price_Change_Pct
+    (0.05 == +5%); an optional Scenario column labels each row. Returns one row
+    per scenario x forecast month with Adjusted_Forecast and Revenue; pairs with
+    no forecast are dropped. expanded is expand_scenarios(book, scenarios) when
+    the caller already has it.
+    """
+    scenarios, pair, price_change_pct, new_price, rows, scenario_of_row = expanded or expand_scenarios(book, scenarios)
+    factor = 1 + book.params["Effective_Elasticity"].to_numpy()[pair] * price_change_pct
+
+    result = book.forecast.iloc[rows][PAIR_KEYS + ["Month", "Month_Period", "Predicted_Units"]].reset_index(drop=True)
+    result.insert(0, "Scenario", scenarios["Scenario"].to_numpy()[scenario_of_row])
+    result["Price_Change_Pct"] = price_change_pct[scenario_of_row]
+    result["New_Price"] = new_price[scenario_of_row]
+    result["Adjusted_Forecast"] = result["Predicted_Units"].to_numpy() * factor[scenario_of_row]
+    result["Revenue"] = result["Adjusted_Forecast"] * result["New_Price"]
+    return result
+
+
+def price_grid(book, price_changes):
+    """Scenario table applying every relative price change to every pair."""
+    price_changes = np.asarray(price_changes, dtype=np.float64)
+    pairs = book.params[PAIR_KEYS]
+    grid = pairs.iloc[np.repeat(np.arange(len(pairs)), len(price_changes))].reset_index(drop=True)
+    grid["Price_Change_Pct"] = np.tile(price_changes, len(pairs))
+    return grid
+
+
+def scenario_totals(results):
+    """Adjusted units and revenue (and any uncertainty bands) summed over the forecast horizon per scenario."""
+    values = ["Predicted_Units", "Adjusted_Forecast", "Revenue"] + [c for c in BAND_COLUMNS if c in results.columns]
+    return (
+        results
+        .groupby(["Scenario"] + PAIR_KEYS + ["Price_Change_Pct", "New_Price"], observed=True, sort=False)[values]
+        .sum()
+        .reset_index()
+    )
+
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT)
+def _forecast_book(forecast_version, elasticity_version, swot_version):
+    return build_forecast_book(load_version("monthly_forecast", forecast_version),
+                               build_elasticity_index(load_version("elasticity", elasticity_version)),
+                               intensity_by_country(competitive_intensity({"swot": swot_version})))
+
+
+def forecast_book(versions=None):
+    """Forecast book for the served monthly forecast, elasticity and SWOT files; versions overrides some of them."""
+    return _forecast_book(served_version("monthly_forecast", versions), served_version("elasticity", versions),
+                          served_version("swot", versions))
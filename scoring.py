@@ -0,0 +1,110 @@
+# scoring.py
+import numpy as np
+import streamlit as st
+
+from clustering import CLUSTER_LABELS, distributor_segments
+from data_loader import VERSIONS_KEPT, served_version
+
+# Default metric -> weight in the composite score. assets/KPI Compute.png only weights the components
+# inside KPI_Score and Engagement_Score, not the metrics against each other; these are this scorer's
+# choice (revenue, growth and KPI count most) and the Tab 2 sliders take others. Rescaled to sum to 1
+SCORE_WEIGHTS = {
+    "Revenue_INR": 0.20,
+    "Sales_Growth_%": 0.20,
+    "KPI_Score": 0.20,
+    "Engagement_Score": 0.15,
+    "Lead_Time_Compliance": 0.10,
+    "Return_Rate": 0.10,
+    "Exclusive": 0.05,
+}
+# Metrics where lower is better
+LOWER_IS_BETTER = {"Return_Rate"}
+# Weight sets kept per data version (the default plus a few interactive tweaks)
+WEIGHT_SETS_KEPT = 4
+
+INDEX_KEYS = ["Country", "Cluster_Labels"]
+SCORED_COLUMNS = ["Distributor_Name", "Weighted_Score", "Country_Percentile", "KPI_Score", "Engagement_Score",
+                  "Revenue_INR", "Sales_Growth_%", "Lead_Time_Compliance", "Return_Rate", "Exclusive"]
+
+
+def _metric_matrix(distributor_df, metrics):
+    """(distributor, metric) float array; Exclusive Yes/No becomes 1/0."""
+    return np.column_stack([
+        (distributor_df[m].astype(str).str.strip().str.lower() == "yes").to_numpy(dtype=np.float64)
+        if m == "Exclusive" else distributor_df[m].to_numpy(dtype=np.float64)
+        for m in metrics
+    ])
+
+
+def weighted_scores(distributor_df, weights=SCORE_WEIGHTS):
+    """0-100 composite score per distributor.
+
+    Each metric is min-max scaled across all distributors (flipped where lower
+    is better), so scores are comparable between countries; a constant metric
+    contributes its full weight to everyone.
+    """
+    unknown = set(weights) - set(SCORE_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown score metrics: {sorted(unknown)}")
+    metrics = list(weights)
+    w = np.array([weights[m] for m in metrics], dtype=np.float64)
+    if (w < 0).any() or w.sum() <= 0:
+        raise ValueError("Score weights must be non-negative and not all zero")
+
+    X = _metric_matrix(distributor_df, metrics)
+    lo, hi = np.nanmin(X, axis=0, initial=np.inf), np.nanmax(X, axis=0, initial=-np.inf)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    scaled = np.where(hi > lo, (X - lo) / span, 1.0)
+    flip = np.array([m in LOWER_IS_BETTER for m in metrics])
+    scaled[:, flip] = 1 - scaled[:, flip]
+    return np.nan_to_num(scaled) @ (w / w.sum()) * 100
+
+
+def score_distributors(segments, weights=SCORE_WEIGHTS):
+    """Segmented distributors with Weighted_Score and per-country percentile ranks.
+
+    Country_Percentile (and <metric>_Pct for each weighted metric) come from one
+    groupby-rank over all countries. The result is indexed by Country and
+    Cluster_Labels, sorted best score first, so a country's high-potential
+    table is scores.loc[(country, CLUSTER_LABELS[0])].
+    """
+    scored = segments.assign(Weighted_Score=weighted_scores(segments, weights))
+    ranked = [m for m in weights if m != "Exclusive"]
+    by_country = scored.groupby("Country", observed=True)
+    scored["Country_Percentile"] = by_country["Weighted_Score"].rank(pct=True)
+    pct = by_country[ranked].rank(pct=True)
+    # Lower-is-better metrics rank the other way round
+    for m in LOWER_IS_BETTER & set(ranked):
+        pct[m] = by_country[m].rank(pct=True, ascending=False)
+    scored[[m + "_Pct" for m in ranked]] = pct[ranked].to_numpy()
+    scored = scored.sort_values(INDEX_KEYS + ["Weighted_Score"], ascending=[True, True, False])
+    return scored.set_index(INDEX_KEYS)
+
+
+def weights_key(weights):
+    return tuple(sorted(weights.items()))
+
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT * WEIGHT_SETS_KEPT)
+def _distributor_scores(distributor_version, clusters_version, weights_items):
+    segments = distributor_segments({"distributor": distributor_version, "clusters": clusters_version})
+    return score_distributors(segments, dict(weights_items))
+
+
+def distributor_scores(weights=None, versions=None):
+    """Scored distributors for the served Distributor_Data (or versions), cached per weights and data version."""
+    return _distributor_scores(served_version("distributor", versions), served_version("clusters", versions),
+                               weights_key(weights or SCORE_WEIGHTS))
+
+
+def high_potential_countries(scores):
+    """Countries with at least one high-potential distributor, sorted."""
+    labels = scores.index.get_level_values("Cluster_Labels")
+    return sorted(scores.index.get_level_values("Country")[labels == CLUSTER_LABELS[0]].unique())
+
+
+def high_potential(scores, country):
+    """High-potential distributors of one country, best score first."""
+    key = (country, CLUSTER_LABELS[0])
+    rows = scores.loc[[key], SCORED_COLUMNS] if key in scores.index else scores.iloc[:0][SCORED_COLUMNS]
+    return rows.reset_index()
@@ -0,0 +1,63 @@
+# startup.py
+import json
+import os
+import time
+
+# One JSON line per cold start, so time-to-first-paint can be compared across releases
+STARTUP_LOG = os.environ.get("GTM_STARTUP_LOG", "startup_timings.jsonl")
+RELEASE = os.environ.get("GTM_RELEASE", "dev")
+RENDER_PHASE = "first_render"
+
+# Module state survives reruns (the module stays imported), so only the first script run is timed
+_phases = {}
+_last = None
+_done = False
+
+
+def begin():
+    """Start the clock; a no-op on every run after the first."""
+    global _last
+    if not _done and _last is None:
+        _last = time.perf_counter()
+
+
+def mark(phase):
+    """Charge the time since the previous mark to phase."""
+    global _last
+    if _done or _last is None:
+        return
+    now = time.perf_counter()
+    _phases[phase] = _phases.get(phase, 0.0) + (now - _last)
+    _last = now
+
+
+def timed(phase, fn, *args, **kwargs):
+    """Call fn, charging its time to phase and the time before it to rendering."""
+    mark(RENDER_PHASE)
+    result = fn(*args, **kwargs)
+    mark(phase)
+    return result
+
+
+def finish():
+    """Close the first run and append its timings to STARTUP_LOG."""
+    global _done
+    if _done or _last is None:
+        return
+    _done = True
+    record = {
+        "release": RELEASE,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in _phases.items()},
+        "total_ms": round(sum(_phases.values()) * 1000, 1),
+    }
+    try:
+        with open(STARTUP_LOG, "a") as fh:
+            fh.write(json.dumps(record) + "\n")
+    except OSError:
+        pass  # Read-only filesystem: timing is best effort
+
+
+def report():
+    """Phase timings (seconds) recorded so far for this process's first run."""
+    return dict(_phases)
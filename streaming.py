@@ -0,0 +1,99 @@
+# streaming.py
+from typing import NamedTuple
+
+import pandas as pd
+import streamlit as st
+
+from data_loader import VERSIONS_KEPT, check_version, dataset_path, prepare, served_version
+from periods import quarter_labels
+
+CHUNK_ROWS = 500_000  # rows parsed per chunk; bounds ingest memory independently of file size
+
+
+MODEL_KEYS = ["Country", "Bike_Model", "Quarter_Period"]
+DISTRIBUTOR_KEYS = ["Country", "Distributor", "Quarter_Period"]
+
+
+class SalesAggregates(NamedTuple):
+    country_quarter: pd.DataFrame              # Country, Quarter_Period, Quarter, Sales_Units
+    country_model_quarter: pd.DataFrame        # Country, Bike_Model, Quarter_Period, Quarter, Sales_Units
+    country_distributor_quarter: pd.DataFrame  # Country, Distributor, Quarter_Period, Quarter, Sales_Units
+    rows: int                                  # raw rows folded in
+
+
+def read_chunks(path, columns=None, chunksize=CHUNK_ROWS):
+    """Yield prepared chunks of a CSV without ever holding the whole file.
+
+    The file is opened in universal-newline mode, so bare-CR and CRLF line
+    endings are normalised as the text streams through; each chunk then gets
+    the loader's compact dtypes and period codes.
+    """
+    usecols = (lambda col: col.strip() in columns) if columns else None
+    with open(path, newline=None, encoding="utf-8") as fh:
+        for chunk in pd.read_csv(fh, usecols=usecols, chunksize=chunksize):
+            yield prepare(chunk)
+
+
+def fold(running, chunk, keys, value_col="Sales_Units"):
+    """Add one chunk's per-key totals into the running totals (a Series indexed by keys)."""
+    part = chunk.groupby(keys, observed=True)[value_col].sum()
+    if running is None:
+        return part
+    # Chunks carry their own categories, so combine on the labels
+    return pd.concat([running, part]).groupby(level=list(range(len(keys))), observed=True).sum()
+
+
+def _source_columns(key_sets, value_col):
+    cols = {k for keys in key_sets for k in keys if not k.endswith("_Period")} | {value_col}
+    if any("Quarter_Period" in keys for keys in key_sets):
+        cols.add("Quarter")
+    return sorted(cols)
+
+
+def fold_totals(chunks, key_sets, value_col="Sales_Units"):
+    """Fold every chunk into one running total per key set; returns (frames, rows folded)."""
+    running, rows = [None] * len(key_sets), 0
+    for chunk in chunks:
+        running = [fold(r, chunk, keys, value_col) for r, keys in zip(running, key_sets)]
+        rows += len(chunk)
+    frames = [
+        pd.DataFrame(columns=keys + [value_col]) if r is None else r.reset_index().sort_values(keys, ignore_index=True)
+        for r, keys in zip(running, key_sets)
+    ]
+    return frames, rows
+
+
+def aggregate_csv(path, keys, value_col="Sales_Units", chunksize=CHUNK_ROWS):
+    """Totals of value_col per keys over a whole CSV, streamed chunk by chunk."""
+    (totals,), rows = fold_totals(read_chunks(path, _source_columns([keys], value_col), chunksize), [keys], value_col)
+    return totals, rows
+
+
+def _with_labels(df):
+    df.insert(df.columns.get_loc("Quarter_Period") + 1, "Quarter", quarter_labels(df["Quarter_Period"]))
+    return df
+
+
+def summarise_sales(chunks):
+    """Fold Sales_Data chunks (or [sales_df]) into SalesAggregates."""
+    (cmq, cdq), rows = fold_totals(chunks, [MODEL_KEYS, DISTRIBUTOR_KEYS])
+    cq = cmq.groupby(["Country", "Quarter_Period"], observed=True, as_index=False)["Sales_Units"].sum()
+    return SalesAggregates(_with_labels(cq), _with_labels(cmq), _with_labels(cdq), rows)
+
+
+def aggregate_sales(path=None, chunksize=CHUNK_ROWS):
+    """Stream Sales_Data into Country x Model and Country x Distributor quarterly totals (and Country x Quarter)."""
+    columns = _source_columns([MODEL_KEYS, DISTRIBUTOR_KEYS], "Sales_Units")
+    return summarise_sales(read_chunks(path or dataset_path("sales"), columns, chunksize))
+
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT)
+def _sales_aggregates(version):
+    aggregates = aggregate_sales(version[0])
+    check_version(version)
+    return aggregates
+
+
+def sales_aggregates(versions=None):
+    """Streamed Sales_Data aggregates for the served file version (or versions["sales"]), built once per version."""
+    return _sales_aggregates(served_version("sales", versions))
@@ -0,0 +1,219 @@
+# synthetic.py
+import argparse
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATASETS, LINE_TERMINATORS
+from periods import month_labels, quarter_labels
+
+
+class Scale(NamedTuple):
+    countries: int
+    models: int
+    distributors: int   # per country
+    quarters: int       # quarters of actuals
+    competitors: int    # SWOT rows per country
+    horizon: int = 2    # forecast quarters after the actuals
+    sellers: int = None  # distributors selling each model per quarter (default: all of the country's)
+
+
+# Sales_Data rows = countries x models x sellers x quarters
+SCALES = {
+    # Shaped like the shipped files: 100 Sales_Data rows, each model sold by one distributor
+    "sample": Scale(countries=5, models=5, distributors=4, quarters=4, competitors=5, sellers=1),
+    "100k": Scale(countries=10, models=20, distributors=50, quarters=10, competitors=5),
+    "1m": Scale(countries=20, models=25, distributors=100, quarters=20, competitors=8),
+    "10m": Scale(countries=50, models=40, distributors=250, quarters=20, competitors=10),
+}
+
+FIRST_QUARTER = 2020 * 4  # Q1-2020
+
+# Names from the shipped sample; larger scales continue with numbered names
+COUNTRY_NAMES = ["Nigeria", "Philippines", "Colombia", "Egypt", "Bangladesh"]
+MODEL_NAMES = ["Pulsar NS200", "Dominar 400", "CT100", "Avenger 160", "Platina 110"]
+COMPETITORS = ["Bajaj Auto", "TVS", "Honda", "Yamaha", "Suzuki"]
+SWOT_TEXT = {
+    "Strength": ["Affordable pricing", "Fuel efficiency", "High-performance bikes", "Strong brand", "Wide dealer network"],
+    "Weakness": ["High maintenance cost", "Limited model range", "Limited service centers", "Outdated designs", "Weak brand presence"],
+    "Opportunity": ["EV expansion", "Growing 2W demand", "Untapped rural market", "Urban mobility push", "Youth population growth"],
+    "Threat": ["Currency volatility", "High competition", "Import restrictions", "Local brands rising", "Policy changes"],
+}
+TIER_LABELS = ["Average Potential", "Very High Potential", "Good Potential"]
+
+
+def _names(base, n, prefix):
+    return base[:n] + [f"{prefix} {i:03d}" for i in range(len(base) + 1, n + 1)]
+
+
+def _categorical(codes, labels):
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+def generate(scale, seed=0):
+    """Synthetic datasets in the raw CSV schemas, keyed like data_loader.DATASETS.
+
+    Label columns come back as categoricals so the 10M-row scale stays in memory;
+    everything else matches what pd.read_csv produces for the real files.
+    """
+    rng = np.random.default_rng(seed)
+    C, M, D, Q, H = scale.countries, scale.models, scale.distributors, scale.quarters, scale.horizon
+    S = min(scale.sellers or D, D)
+    countries = _names(COUNTRY_NAMES, C, "Country")
+    models = _names(MODEL_NAMES, M, "Model")
+    # NIG_D1 style for the sample countries, C006_D1 beyond them so names stay unique
+    prefixes = [name[:3].upper() if i < len(COUNTRY_NAMES) else f"C{i + 1:03d}" for i, name in enumerate(countries)]
+    distributors = [f"{p}_D{d + 1}" for p in prefixes for d in range(D)]
+    periods = FIRST_QUARTER + np.arange(Q + H)
+    quarters = quarter_labels(periods)
+
+    # --- Sales_Data: one row per country x model x quarter x selling distributor ---
+    c, m, q, s = np.unravel_index(np.arange(C * M * Q * S), (C, M, Q, S))
+    d = (m * S + s) % D  # consecutive models go to different distributors when S < D
+    pair_base = rng.lognormal(np.log(500 / S), 0.3, size=(C, M))
+    growth = rng.normal(0.02, 0.03, size=C)
+    units = pair_base[c, m] * (1 + growth[c]) ** q * rng.lognormal(0, 0.2, size=len(c))
+    sales = pd.DataFrame({
+        "Country": _categorical(c, countries),
+        "Bike_Model": _categorical(m, models),
+        "Quarter": _categorical(q, quarters),
+        "Sales_Units": np.rint(units).astype(np.int64),
+        "Distributor": _categorical(c * D + d, distributors),
+    })
+
+    # --- Forecasts for the next H quarters per country x model ---
+    fc, fm, fh = np.unravel_index(np.arange(C * M * H), (C, M, H))
+    predicted = np.rint(pair_base[fc, fm] * S * (1 + growth[fc]) ** (Q + fh)).astype(np.int64)
+    pair_mape = np.round(rng.uniform(5, 30, size=(C, M)), 2)
+    forecast = pd.DataFrame({
+        "Country": _categorical(fc, countries),
+        "Bike_Model": _categorical(fm, models),
+        "Quarter": quarter_labels(periods[Q + fh], compact=True),
+        "Predicted_Units": predicted,
+        "MAPE (%)": pair_mape[fc, fm],
+        "Actual_Units": np.nan,
+    })
+
+    # --- Merged data: actuals (A) followed by forecast quarters (F) ---
+    merged = pd.DataFrame({
+        "Country": _categorical(np.concatenate([c, fc]), countries),
+        "Bike_Model": _categorical(np.concatenate([m, fm]), models),
+        "Quarter": _categorical(np.concatenate([q, Q + fh]), quarters),
+        "Sales_Units": np.concatenate([sales["Sales_Units"].to_numpy(), predicted]),
+        "A_F": np.repeat(np.array(["A", "F"], dtype=object), [len(c), len(fc)]),
+    })
+
+    # --- Monthly forecast: each forecast quarter split into three months ---
+    row = np.repeat(np.arange(len(fc)), 3)
+    q_code = periods[Q + fh][row]
+    month_code = (q_code // 4) * 12 + (q_code % 4) * 3 + np.tile(np.arange(3), len(fc))
+    base_price = rng.normal(2000, 150, size=(C, M))
+    monthly = pd.DataFrame({
+        "Country": _categorical(fc[row], countries),
+        "Bike_Model": _categorical(fm[row], models),
+        "Month": month_labels(month_code),
+        "Predicted_Units": np.rint(predicted[row] / 3).astype(np.int64),
+        "MAPE (%)": pair_mape[fc[row], fm[row]],
+        "Unit_Price": np.round(base_price[fc[row], fm[row]] * rng.normal(1, 0.02, size=len(row)), 2),
+    })
+
+    # --- Adj_Price_Elasticity: one row per country x model ---
+    ec, em = np.unravel_index(np.arange(C * M), (C, M))
+    intensity = np.round(rng.uniform(0.45, 0.72, size=C), 3)
+    elasticity = pd.DataFrame({
+        "Country": _categorical(ec, countries),
+        "Bike_Model": _categorical(em, models),
+        "Elasticity": np.round(rng.normal(-1.1, 1.2, size=C * M), 3),
+        "R_squared": np.round(rng.uniform(0, 0.45, size=C * M), 3),
+        "N_obs": np.full(C * M, Q * 3, dtype=np.int64),
+        "Comp_Intensity": intensity[ec],
+    })
+
+    # --- Distributor_Data and a previous clustering of it ---
+    dc = np.repeat(np.arange(C), D)
+    orders = rng.integers(100, 1000, size=C * D)
+    revenue = orders * rng.uniform(1300, 2700, size=C * D)
+    distributor = pd.DataFrame({
+        "Country": [countries[i] for i in dc],
+        "Distributor_Name": distributors,
+        "Total_Orders": orders,
+        "Revenue_INR": np.round(revenue, 4),
+        "Sales_Growth_%": np.round(rng.uniform(-5, 17, size=C * D), 2),
+        "Marketing_Spend_INR": np.round(revenue * rng.uniform(0.04, 0.11, size=C * D), 5),
+        "Engagement_Score": np.round(rng.uniform(0.3, 0.95, size=C * D), 2),
+        "KPI_Score": np.round(rng.uniform(0.4, 0.95, size=C * D), 2),
+        "Return_Rate": np.round(rng.uniform(0.01, 0.1, size=C * D), 2),
+        "Lead_Time_Compliance": np.round(rng.uniform(0.65, 0.97, size=C * D), 2),
+        "Exclusive": np.where(rng.random(C * D) < 0.5, "Yes", "No"),
+        "Num_Subdealers": rng.integers(20, 150, size=C * D),
+    })
+    cluster = rng.integers(0, len(TIER_LABELS), size=C * D)
+    clusters = distributor.assign(Cluster=cluster, Tier_Label=np.asarray(TIER_LABELS)[cluster])
+
+    # --- Competitor_SWOT_Data: `competitors` rows per country ---
+    sc = np.repeat(np.arange(C), scale.competitors)
+    n_swot = len(sc)
+    swot = pd.DataFrame({
+        "Country": [countries[i] for i in sc],
+        "Competitor": np.asarray(COMPETITORS)[rng.integers(0, len(COMPETITORS), size=n_swot)],
+        "Market_Share_%": np.round(rng.uniform(5, 37, size=n_swot), 2),
+        **{col: np.asarray(text)[rng.integers(0, len(text), size=n_swot)] for col, text in SWOT_TEXT.items()},
+    })
+
+    return {
+        "sales": sales,
+        "distributor": distributor,
+        "forecast": forecast,
+        "merged": merged,
+        "clusters": clusters,
+        "swot": swot,
+        "elasticity": elasticity,
+        "monthly_forecast": monthly,
+    }
+
+
+def price_history(scale, seed=0):
+    """Unit_Price / Sales_Units observations per Country x Bike_Model, the input of estimate_elasticities.
+
+    One row per Sales_Data row (country x model x quarter x seller), with units
+    following a known elasticity per pair around a jittered price.
+    """
+    rng = np.random.default_rng(seed)
+    C, M, D, Q = scale.countries, scale.models, scale.distributors, scale.quarters
+    S = min(scale.sellers or D, D)
+    countries = _names(COUNTRY_NAMES, C, "Country")
+    models = _names(MODEL_NAMES, M, "Model")
+    c, m, q, _ = np.unravel_index(np.arange(C * M * Q * S), (C, M, Q, S))
+    base_price = rng.normal(2000, 150, size=(C, M))
+    elasticity = rng.normal(-1.1, 0.6, size=(C, M))
+    price = base_price[c, m] * rng.lognormal(0, 0.1, size=len(c))
+    units = (rng.lognormal(np.log(500), 0.3, size=(C, M))[c, m] * (price / base_price[c, m]) ** elasticity[c, m]
+             * rng.lognormal(0, 0.1, size=len(c)))
+    return pd.DataFrame({
+        "Country": _categorical(c, countries),
+        "Bike_Model": _categorical(m, models),
+        "Quarter": _categorical(q, quarter_labels(FIRST_QUARTER + np.arange(Q))),
+        "Unit_Price": np.round(price, 2),
+        "Sales_Units": np.rint(units).astype(np.int64),
+    })
+
+
+def write_csvs(datasets, out_dir):
+    """Write generated datasets under out_dir with the real file names and line endings."""
+    os.makedirs(out_dir, exist_ok=True)
+    for name, df in datasets.items():
+        df.to_csv(os.path.join(out_dir, DATASETS[name]), index=False, lineterminator=LINE_TERMINATORS.get(name, "\n"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic GTM datasets in the real CSV schemas.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", choices=SCALES, default="sample")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    datasets = generate(SCALES[args.scale], args.seed)
+    write_csvs(datasets, args.out_dir)
+    for name, df in datasets.items():
+        print(f"{name}: {len(df)} rows")
@@ -0,0 +1,180 @@
+# text_index.py
+import re
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import VERSIONS_KEPT, load_version, served_version
+
+SWOT_FIELDS = ["Strength", "Weakness", "Opportunity", "Threat"]
+STOPWORDS = frozenset({"a", "an", "and", "for", "in", "of", "on", "the", "to", "with"})
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class SwotIndex(NamedTuple):
+    countries: pd.Index       # country code -> name
+    competitors: pd.Index     # competitor code -> name
+    phrases: pd.DataFrame     # one row per distinct (Field, Snippet); Tokens is the snippet's token tuple
+    terms: pd.Index           # sorted vocabulary, term code -> term
+    term_indptr: np.ndarray   # phrases containing term t: term_phrases[term_indptr[t]:term_indptr[t + 1]]
+    term_phrases: np.ndarray
+    phrase_term_indptr: np.ndarray  # terms of phrase p: phrase_terms[phrase_term_indptr[p]:phrase_term_indptr[p + 1]]
+    phrase_terms: np.ndarray
+    phrase_indptr: np.ndarray  # postings of phrase p: positions phrase_indptr[p]:phrase_indptr[p + 1] below
+    country: np.ndarray       # posting -> country code
+    competitor: np.ndarray    # posting -> competitor code
+    count: np.ndarray         # posting -> snippets of that phrase from that (Country, Competitor)
+
+
+def tokenize(text):
+    return tuple(t for t in _TOKEN.findall(str(text).lower()) if t not in STOPWORDS)
+
+
+def _indptr(codes, n):
+    return np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=n))])
+
+
+def _expand(indptr, ids):
+    """(positions, owner) of the CSR slices of ids; owner[i] is the index into ids each position came from."""
+    n = indptr[ids + 1] - indptr[ids]
+    owner = np.repeat(np.arange(len(ids)), n)
+    return np.repeat(indptr[ids], n) + np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n), owner
+
+
+def build_swot_index(swot_df, fields=SWOT_FIELDS):
+    """Inverted index over the SWOT text fields.
+
+    Snippets repeat heavily, so each distinct (Field, Snippet) is tokenised
+    once. Terms point at phrases, and each phrase holds deduplicated
+    (Country, Competitor, count) postings; a query never touches raw rows.
+    """
+    country_codes, countries = pd.factorize(swot_df["Country"], sort=True)
+    competitor_codes, competitors = pd.factorize(swot_df["Competitor"], sort=True)
+    n_competitors = max(len(competitors), 1)
+    pair = country_codes.astype(np.int64) * n_competitors + competitor_codes
+    pair_span = max(len(countries), 1) * n_competitors
+
+    keys, field_of, snippets, offset = [], [], [], 0
+    for field in fields:
+        codes, uniques = pd.factorize(swot_df[field])
+        known = (codes >= 0) & (country_codes >= 0) & (competitor_codes >= 0)
+        keys.append((codes[known] + offset) * pair_span + pair[known])
+        field_of += [field] * len(uniques)
+        snippets += [str(u) for u in uniques]
+        offset += len(uniques)
+
+    # Postings: distinct (phrase, country, competitor) with the number of snippets behind each
+    posting, count = np.unique(np.concatenate(keys) if keys else np.empty(0, dtype=np.int64), return_counts=True)
+    posting_phrase = posting // pair_span
+    tokens = [tokenize(s) for s in snippets]
+    phrases = pd.DataFrame({"Field": field_of, "Snippet": snippets, "Tokens": tokens})
+
+    distinct_terms = [sorted(set(t)) for t in tokens]
+    term_codes, terms = pd.factorize(pd.Series([t for ts in distinct_terms for t in ts], dtype=object), sort=True)
+    pair_phrase = np.repeat(np.arange(offset), [len(ts) for ts in distinct_terms])
+    return SwotIndex(
+        countries=pd.Index(countries), competitors=pd.Index(competitors), phrases=phrases, terms=pd.Index(terms),
+        term_indptr=_indptr(term_codes, len(terms)),
+        term_phrases=pair_phrase[np.argsort(term_codes, kind="stable")],
+        phrase_term_indptr=_indptr(pair_phrase, offset),
+        phrase_terms=term_codes,
+        phrase_indptr=_indptr(posting_phrase, offset),
+        country=(posting % pair_span) // n_competitors,
+        competitor=posting % n_competitors,
+        count=count,
+    )
+
+
+def match_phrases(index, query, fields=None, exact=False):
+    """Phrase ids whose tokens contain every query token (as a contiguous run when exact)."""
+    words = tokenize(query)
+    codes = index.terms.get_indexer(list(words))
+    if not words or (codes < 0).any():
+        return np.empty(0, dtype=np.int64)
+    candidates = None
+    for code in np.unique(codes):
+        found = index.term_phrases[index.term_indptr[code]:index.term_indptr[code + 1]]
+        candidates = found if candidates is None else np.intersect1d(candidates, found, assume_unique=True)
+    if fields is not None:
+        candidates = candidates[np.isin(index.phrases["Field"].to_numpy()[candidates], list(fields))]
+    if exact and len(words) > 1:
+        n = len(words)
+        tokens = index.phrases["Tokens"].to_numpy()
+        candidates = np.array([p for p in candidates
+                               if any(tokens[p][i:i + n] == words for i in range(len(tokens[p]) - n + 1))],
+                              dtype=np.int64)
+    return candidates
+
+
+def _facet_mask(index, positions, countries, competitors):
+    keep = np.ones(len(positions), dtype=bool)
+    if countries is not None:
+        keep &= np.isin(index.country[positions], index.countries.get_indexer(list(countries)))
+    if competitors is not None:
+        keep &= np.isin(index.competitor[positions], index.competitors.get_indexer(list(competitors)))
+    return keep
+
+
+def search(index, query, fields=None, countries=None, competitors=None, exact=False):
+    """Which competitors in which countries mention query, e.g. search(index, "Affordable pricing", ["Strength"]).
+
+    One row per (Country, Competitor, Field, Snippet) with its Mentions, most mentioned first.
+    """
+    phrases = match_phrases(index, query, fields, exact)
+    positions, owner = _expand(index.phrase_indptr, phrases)
+    keep = _facet_mask(index, positions, countries, competitors)
+    positions, phrase = positions[keep], phrases[owner[keep]]
+    result = pd.DataFrame({
+        "Country": index.countries[index.country[positions]],
+        "Competitor": index.competitors[index.competitor[positions]],
+        "Field": index.phrases["Field"].to_numpy()[phrase],
+        "Snippet": index.phrases["Snippet"].to_numpy()[phrase],
+        "Mentions": index.count[positions],
+    })
+    return result.sort_values(["Mentions", "Country", "Competitor"], ascending=[False, True, True], ignore_index=True)
+
+
+def term_frequencies(index, fields=None, countries=None, competitors=None, top_n=None):
+    """Term counts per market: Country, Term, Mentions and Share of that country's snippets in the chosen fields."""
+    phrases = np.arange(len(index.phrases))
+    if fields is not None:
+        phrases = phrases[np.isin(index.phrases["Field"].to_numpy(), list(fields))]
+    positions, owner = _expand(index.phrase_indptr, phrases)
+    keep = _facet_mask(index, positions, countries, competitors)
+    positions, phrase = positions[keep], phrases[owner[keep]]
+    n_countries, n_terms = len(index.countries), len(index.terms)
+    snippets = np.bincount(index.country[positions], weights=index.count[positions], minlength=n_countries)
+
+    # Each posting counts once for every distinct term of its phrase; sums are kept sparse (vocabularies can be large)
+    term_pos, owner = _expand(index.phrase_term_indptr, phrase)
+    posting = positions[owner]
+    inverse, key = pd.factorize(index.country[posting] * n_terms + index.phrase_terms[term_pos])
+    mentions = np.bincount(inverse, weights=index.count[posting], minlength=len(key))
+    country, term = key // n_terms, key % n_terms
+
+    # Codes are in sorted order, so one lexsort ranks terms within each country; top_n keeps each run's head
+    order = np.lexsort((term, -mentions, country))
+    if top_n:
+        starts = np.flatnonzero(np.r_[True, np.diff(country[order]) != 0]) if len(order) else np.empty(0, dtype=np.int64)
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        order = order[rank < top_n]
+    country, term, mentions = country[order], term[order], mentions[order]
+    return pd.DataFrame({
+        "Country": index.countries[country],
+        "Term": index.terms[term],
+        "Mentions": mentions.astype(np.int64),
+        "Share": mentions / snippets[country],
+    })
+
+
+# Shared across sessions and reruns rather than unpickled per access; the index is read-only
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT)
+def _swot_index(version):
+    return build_swot_index(load_version("swot", version))
+
+
+def swot_index(versions=None):
+    """Text index for the served Competitor_SWOT_Data (or versions["swot"]), built once per version."""
+    return _swot_index(served_version("swot", versions))
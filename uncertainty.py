@@ -0,0 +1,83 @@
+# uncertainty.py
+import numpy as np
+
+from scenarios import BAND_COLUMNS, evaluate_scenarios, expand_scenarios
+
+N_SAMPLES = 20_000
+PERCENTILES = (10, 50, 90)
+# Elasticity standard error is capped at this multiple of |elasticity| (and used as-is when the fit is unusable)
+MAX_REL_SE = 1.0
+# Scenario x sample cells drawn per block, bounds memory for whole-grid runs
+BLOCK_CELLS = 4_000_000
+
+
+def elasticity_se(elasticity, r_squared, n_obs):
+    """Standard error of a log-log slope recovered from its R^2 and number of observations.
+
+    For a one-regressor OLS fit t = r * sqrt(n - 2) / sqrt(1 - r^2), so se = |b| / t.
+    """
+    elasticity, r_squared, n_obs = (np.asarray(a, dtype=np.float64) for a in (elasticity, r_squared, n_obs))
+    cap = MAX_REL_SE * np.abs(elasticity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.sqrt(r_squared * (n_obs - 2) / (1 - r_squared))
+        se = np.where(r_squared >= 1, 0.0, np.abs(elasticity) / t)
+    usable = (n_obs > 2) & (r_squared > 0)
+    return np.where(usable, np.minimum(se, cap), cap)
+
+
+def multiplier_percentiles(mape, elasticity, se, intensity, price_change_pct, n_samples=N_SAMPLES, seed=0):
+    """(scenario, len(PERCENTILES)) percentiles of the random factor applied to each scenario's forecast.
+
+    Each sample draws a forecast error with E|e| = MAPE (normal, so sd = MAPE * sqrt(pi / 2)) and an
+    elasticity from N(elasticity, se); units = forecast * (1 + e) * (1 + elasticity * intensity * change),
+    floored at 0. Draws are shared across scenarios (common random numbers) so bands move smoothly with price.
+    """
+    rng = np.random.default_rng(seed)
+    z_error, z_elasticity = rng.standard_normal((2, n_samples))
+    sd = np.asarray(mape, dtype=np.float64)[:, None] / 100 * np.sqrt(np.pi / 2)
+    slope = (np.asarray(intensity) * np.asarray(price_change_pct))[:, None]
+    elasticity, se = np.asarray(elasticity)[:, None], np.asarray(se)[:, None]
+
+    out = np.empty((len(sd), len(PERCENTILES)))
+    block = max(1, BLOCK_CELLS // n_samples)
+    for lo in range(0, len(sd), block):
+        hi = lo + block
+        factor = (1 + sd[lo:hi] * z_error) * (1 + (elasticity[lo:hi] + se[lo:hi] * z_elasticity) * slope[lo:hi])
+        np.maximum(factor, 0, out=factor)
+        out[lo:hi] = _percentiles(factor)
+    return out
+
+
+def _percentiles(samples):
+    """Nearest-rank PERCENTILES along axis 1; one single-kth partition each is far cheaper than np.percentile."""
+    n = samples.shape[1]
+    return np.stack([np.partition(samples, k, axis=1)[:, k] for k in (round(p / 100 * (n - 1)) for p in PERCENTILES)],
+                    axis=1)
+
+
+def simulate_scenarios(book, scenarios, n_samples=N_SAMPLES, seed=0):
+    """evaluate_scenarios plus P10/P50/P90 bands for adjusted units and revenue.
+
+    The forecast error and elasticity draw of a sample apply to every month of
+    its scenario, so a month's percentile is the scenario's factor percentile
+    times that month's forecast, and band columns sum to horizon-total bands.
+    """
+    expanded = expand_scenarios(book, scenarios)
+    result = evaluate_scenarios(book, scenarios, expanded)
+    _, pair, price_change_pct, _, rows, scenario_of_row = expanded
+
+    params = book.params
+    pair_of_row = np.repeat(np.arange(len(params)), book.counts)
+    mape = np.bincount(pair_of_row, weights=book.forecast["MAPE (%)"].to_numpy(dtype=np.float64),
+                       minlength=len(params)) / np.maximum(book.counts, 1)
+    se = elasticity_se(params["Elasticity"], params["R_squared"], params["N_obs"])
+
+    factors = multiplier_percentiles(
+        mape[pair], params["Elasticity"].to_numpy()[pair], se[pair], params["Comp_Intensity"].to_numpy()[pair],
+        price_change_pct, n_samples, seed,
+    )[scenario_of_row]
+    units = result["Predicted_Units"].to_numpy(dtype=np.float64)[:, None] * factors
+    revenue = units * result["New_Price"].to_numpy()[:, None]
+    for i, col in enumerate(BAND_COLUMNS):
+        result[col] = (units if col.startswith("Adjusted") else revenue)[:, i % len(PERCENTILES)]
+    return result
@@ -0,0 +1,146 @@
+# watcher.py
+import os
+import threading
+import time
+import traceback
+
+import clustering
+import cube
+import elasticity
+import intensity
+import scenarios
+import scoring
+import streaming
+import text_index
+from data_loader import DATASETS, StaleVersionError, current_version, dataset_version, publish
+from pipeline import OUTPUT_INPUTS, output
+
+# On by default in the app; GTM_WATCH=0 serves whatever is on disk at each access instead
+WATCH_ENABLED = os.environ.get("GTM_WATCH", "1") != "0"
+POLL_SECONDS = float(os.environ.get("GTM_WATCH_INTERVAL", 2.0))
+
+# Derived artifact -> (datasets it is built from, rebuild(versions) that warms its cache entry);
+# each rebuild reads exactly the versions it is given, never whatever is on disk by then
+ARTIFACTS = {
+    "performance_cube": (("merged",), cube.performance_cube),
+    "sales_aggregates": (("sales",), streaming.sales_aggregates),
+    "elasticity_index": (("elasticity",), elasticity.elasticity_index),
+    "country_intensity": (("swot",), intensity.competitive_intensity),
+    "swot_index": (("swot",), text_index.swot_index),
+    "forecast_book": (("monthly_forecast", "elasticity", "swot"), scenarios.forecast_book),
+    "distributor_segments": (("distributor", "clusters"), clustering.distributor_segments),
+    "distributor_scores": (("distributor", "clusters"), lambda v: scoring.distributor_scores(versions=v)),
+    **{
+        "output:" + name: (inputs, lambda v, name=name: output(name, v))
+        for name, inputs in OUTPUT_INPUTS.items()
+    },
+}
+
+
+def affected_artifacts(changed):
+    """Artifacts built from any of the changed datasets, in ARTIFACTS order."""
+    return [name for name, (inputs, _) in ARTIFACTS.items() if set(inputs) & set(changed)]
+
+
+class DataWatcher:
+    """Polls data/ and rebuilds only what a changed file feeds, off the session threads.
+
+    Sessions keep being served the published versions (see data_loader.dataset_version)
+    until every affected artifact has been rebuilt; a failed rebuild (e.g. a
+    half-copied CSV) leaves the last good version published.
+    """
+
+    def __init__(self, interval=POLL_SECONDS):
+        self.interval = interval
+        self._thread = None
+        self._failed = {}  # dataset -> fingerprint whose rebuild failed; retried once the file changes again
+        self.last_rebuild = None
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="gtm-data-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    @staticmethod
+    def _on_disk():
+        """Dataset name -> fingerprint of every file as it is on disk now."""
+        versions = {}
+        for name in DATASETS:
+            try:
+                versions[name] = current_version(name)
+            except OSError:
+                continue  # Mid-replace or removed: keep serving the last good version
+        return versions
+
+    def changed(self):
+        """Dataset name -> new fingerprint for files that differ from what is served."""
+        return {
+            name: version for name, version in self._on_disk().items()
+            if version != dataset_version(name) and version != self._failed.get(name)
+        }
+
+    def rebuild(self, changes):
+        """Rebuild every artifact fed by changes, then publish them together."""
+        versions = {name: dataset_version(name) for name in DATASETS}
+        versions.update(changes)
+        artifacts = affected_artifacts(changes)
+        started = time.perf_counter()
+        try:
+            for name in artifacts:
+                ARTIFACTS[name][1](versions)
+        except StaleVersionError:
+            return False  # Replaced again mid-rebuild: the next poll rebuilds the newer version
+        except Exception:
+            self._failed.update(changes)
+            self.last_error = {"datasets": sorted(changes), "error": traceback.format_exc(limit=3)}
+            return False
+        if not self._still_current(changes):
+            return False
+        publish(changes)
+        for name in changes:
+            self._failed.pop(name, None)
+        self.last_rebuild = {
+            "datasets": sorted(changes),
+            "artifacts": artifacts,
+            "seconds": round(time.perf_counter() - started, 3),
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        return True
+
+    @staticmethod
+    def _still_current(changes):
+        """Whether every changed file is still the version its artifacts were just rebuilt from."""
+        try:
+            return all(current_version(name) == version for name, version in changes.items())
+        except OSError:
+            return False
+
+    def poll(self):
+        changes = self.changed()
+        return self.rebuild(changes) if changes else None
+
+    def _run(self):
+        # The first fingerprints are taken here rather than in start(), so hashing every file stays off
+        # the first page load; until they are published, sessions fingerprint just the files they read
+        publish(self._on_disk())
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception:
+                self.last_error = {"datasets": [], "error": traceback.format_exc(limit=3)}
+
+    def status(self):
+        """Served digest per dataset, the newer digests whose rebuild failed, and the last rebuild and error."""
+        return {
+            "served": {name: dataset_version(name)[3][:12] for name in DATASETS},
+            "failed": {name: version[3][:12] for name, version in self._failed.items()},
+            "last_rebuild": self.last_rebuild,
+            "last_error": self.last_error,
+        }
+
+
+# One watcher per server process, shared by every session
+data_watcher = DataWatcher()